@@ -10,16 +10,53 @@ For the full production version, see the Rust implementation.
 import sys
 from pathlib import Path
 
+# Pre-joined assembly templates: one string per VM command instead of a
+# list of per-instruction fragments.
+
+# Shared tail of every push: *SP = D; SP++
+PUSH_TAIL = "@SP\nA=M\nM=D\n@SP\nM=M+1"
+
+# Binary ops work in place via AM=M-1 fusion (5 instructions)
+BINARY_OP_TMPL = "@SP\nAM=M-1\nD=M\nA=A-1\nM={comp}"
+BINARY_OPS = {"add": "D+M", "sub": "M-D", "and": "D&M", "or": "D|M"}
+
+# Unary ops peek at the top in place (3 instructions)
+UNARY_OP_TMPL = "@SP\nA=M-1\nM={comp}"
+UNARY_OPS = {"neg": "-M", "not": "!M"}
+
+# Pop y, peek x, D = x - y, then materialize true (-1) / false (0)
+COMPARISON_TMPL = (
+    "@SP\nAM=M-1\nD=M\nA=A-1\nD=M-D\n"
+    "@{true_label}\nD;{jump}\n"
+    "@SP\nA=M-1\nM=0\n"
+    "@{end_label}\n0;JMP\n"
+    "({true_label})\n"
+    "@SP\nA=M-1\nM=-1\n"
+    "({end_label})"
+)
+COMPARISON_JUMPS = {"eq": "JEQ", "lt": "JLT", "gt": "JGT"}
+
+PUSH_CONST_TMPL = "@{index}\nD=A\n" + PUSH_TAIL
+PUSH_SEG_TMPL = "@{index}\nD=A\n@{base}\nA=D+M\nD=M\n" + PUSH_TAIL
+# Direct-address push/pop: temp, pointer, and static slots
+PUSH_DIRECT_TMPL = "@{addr}\nD=M\n" + PUSH_TAIL
+POP_DIRECT_TMPL = "@SP\nAM=M-1\nD=M\n@{addr}\nM=D"
+# Pop via computed address saved in R13
+POP_SEG_TMPL = (
+    "@{index}\nD=A\n@{base}\nD=D+M\n@R13\nM=D\n@SP\nAM=M-1\nD=M\n@R13\nA=M\nM=D"
+)
+
+SEGMENT_BASES = {"local": "LCL", "argument": "ARG", "this": "THIS", "that": "THAT"}
+
 
 class VMTranslator:
     def __init__(self, filename):
         self.filename = Path(filename).stem
         self.label_counter = 0
 
-    def translate(self, vm_code):
-        """Translate VM code to Hack assembly"""
+    def translate(self, vm_code, write):
+        """Translate VM code to Hack assembly, emitting lines via the writer"""
         lines = vm_code.strip().split("\n")
-        asm_lines = []
 
         for line in lines:
             # Remove comments and whitespace
@@ -32,142 +69,55 @@ class VMTranslator:
             command = parts[0]
 
             # Arithmetic/logical commands
-            if command in ["add", "sub", "and", "or"]:
-                asm_lines.extend(self.translate_binary_op(command))
-            elif command in ["neg", "not"]:
-                asm_lines.extend(self.translate_unary_op(command))
-            elif command in ["eq", "lt", "gt"]:
-                asm_lines.extend(self.translate_comparison(command))
+            if command in BINARY_OPS:
+                write(BINARY_OP_TMPL.format(comp=BINARY_OPS[command]))
+            elif command in UNARY_OPS:
+                write(UNARY_OP_TMPL.format(comp=UNARY_OPS[command]))
+            elif command in COMPARISON_JUMPS:
+                self.translate_comparison(command, write)
             # Memory access commands
             elif command == "push":
                 segment, index = parts[1], int(parts[2])
-                asm_lines.extend(self.translate_push(segment, index))
+                self.translate_push(segment, index, write)
             elif command == "pop":
                 segment, index = parts[1], int(parts[2])
-                asm_lines.extend(self.translate_pop(segment, index))
-
-        return "\n".join(asm_lines)
-
-    def translate_binary_op(self, op):
-        """Translate binary arithmetic/logical operations (5 instructions via AM=M-1 fusion)"""
-        op_map = {"add": "D+M", "sub": "M-D", "and": "D&M", "or": "D|M"}
-        return [
-            "@SP",
-            "AM=M-1",  # SP--, A points to y
-            "D=M",  # D = y
-            "A=A-1",  # A points to x (peek, SP already correct)
-            f"M={op_map[op]}",  # x op y, result in place
-        ]
-
-    def translate_unary_op(self, op):
-        """Translate unary operations (3 instructions via A=M-1 peek)"""
-        op_map = {"neg": "-M", "not": "!M"}
-        return [
-            "@SP",
-            "A=M-1",  # Peek at top (SP unchanged)
-            f"M={op_map[op]}",  # Operate in place
-        ]
-
-    def translate_comparison(self, op):
+                self.translate_pop(segment, index, write)
+
+    def translate_comparison(self, op, write):
         """Translate comparison operations (fused pattern)"""
-        jump_map = {"eq": "JEQ", "lt": "JLT", "gt": "JGT"}
         true_label = f"{op.upper()}_TRUE_{self.label_counter}"
         end_label = f"{op.upper()}_END_{self.label_counter}"
         self.label_counter += 1
 
-        return [
-            "@SP",
-            "AM=M-1",  # SP--, A points to y
-            "D=M",  # D = y
-            "A=A-1",  # A points to x (peek)
-            "D=M-D",  # D = x - y
-            f"@{true_label}",
-            f"D;{jump_map[op]}",  # Jump if condition met
-            "@SP",
-            "A=M-1",
-            "M=0",  # Push false (0), SP already correct
-            f"@{end_label}",
-            "0;JMP",
-            f"({true_label})",
-            "@SP",
-            "A=M-1",
-            "M=-1",  # Push true (-1), SP already correct
-            f"({end_label})",
-        ]
-
-    def translate_push(self, segment, index):
+        write(
+            COMPARISON_TMPL.format(
+                jump=COMPARISON_JUMPS[op], true_label=true_label, end_label=end_label
+            )
+        )
+
+    def translate_push(self, segment, index, write):
         """Translate push commands"""
         if segment == "constant":
-            return [f"@{index}", "D=A", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
-        elif segment in ["local", "argument", "this", "that"]:
-            base_map = {
-                "local": "LCL",
-                "argument": "ARG",
-                "this": "THIS",
-                "that": "THAT",
-            }
-            return [
-                f"@{index}",
-                "D=A",
-                f"@{base_map[segment]}",
-                "A=D+M",
-                "D=M",
-                "@SP",
-                "A=M",
-                "M=D",
-                "@SP",
-                "M=M+1",
-            ]
+            write(PUSH_CONST_TMPL.format(index=index))
+        elif segment in SEGMENT_BASES:
+            write(PUSH_SEG_TMPL.format(index=index, base=SEGMENT_BASES[segment]))
         elif segment == "temp":
-            addr = 5 + index
-            return [f"@{addr}", "D=M", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
+            write(PUSH_DIRECT_TMPL.format(addr=5 + index))
         elif segment == "pointer":
-            addr = "THIS" if index == 0 else "THAT"
-            return [f"@{addr}", "D=M", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
+            write(PUSH_DIRECT_TMPL.format(addr="THIS" if index == 0 else "THAT"))
         elif segment == "static":
-            return [
-                f"@{self.filename}.{index}",
-                "D=M",
-                "@SP",
-                "A=M",
-                "M=D",
-                "@SP",
-                "M=M+1",
-            ]
-        return []
-
-    def translate_pop(self, segment, index):
+            write(PUSH_DIRECT_TMPL.format(addr=f"{self.filename}.{index}"))
+
+    def translate_pop(self, segment, index, write):
         """Translate pop commands (fused AM=M-1 for direct segments)"""
-        if segment in ["local", "argument", "this", "that"]:
-            base_map = {
-                "local": "LCL",
-                "argument": "ARG",
-                "this": "THIS",
-                "that": "THAT",
-            }
-            return [
-                f"@{index}",
-                "D=A",
-                f"@{base_map[segment]}",
-                "D=D+M",
-                "@R13",
-                "M=D",  # Save target address
-                "@SP",
-                "AM=M-1",
-                "D=M",  # Pop value (fused)
-                "@R13",
-                "A=M",
-                "M=D",  # Store at target
-            ]
+        if segment in SEGMENT_BASES:
+            write(POP_SEG_TMPL.format(index=index, base=SEGMENT_BASES[segment]))
         elif segment == "temp":
-            addr = 5 + index
-            return ["@SP", "AM=M-1", "D=M", f"@{addr}", "M=D"]
+            write(POP_DIRECT_TMPL.format(addr=5 + index))
         elif segment == "pointer":
-            addr = "THIS" if index == 0 else "THAT"
-            return ["@SP", "AM=M-1", "D=M", f"@{addr}", "M=D"]
+            write(POP_DIRECT_TMPL.format(addr="THIS" if index == 0 else "THAT"))
         elif segment == "static":
-            return ["@SP", "AM=M-1", "D=M", f"@{self.filename}.{index}", "M=D"]
-        return []
+            write(POP_DIRECT_TMPL.format(addr=f"{self.filename}.{index}"))
 
 
 def main():
@@ -183,13 +133,11 @@ def main():
     # Read VM code
     vm_code = vm_file.read_text()
 
-    # Translate
+    # Translate, streaming assembly straight into the output file
     translator = VMTranslator(vm_file.stem)
-    asm_code = translator.translate(vm_code)
-
-    # Write output
     asm_file = vm_file.with_suffix(".asm")
-    asm_file.write_text(asm_code)
+    with open(asm_file, "w", buffering=1 << 20) as out:
+        translator.translate(vm_code, lambda op: out.write(op + "\n"))
 
     print(f"Translated {vm_file} -> {asm_file}")
 
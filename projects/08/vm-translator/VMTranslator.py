@@ -8,14 +8,27 @@ Supports all 20 VM commands including branching and function calls.
 Usage:
     python3 VMTranslator.py <file.vm>           # Single file
     python3 VMTranslator.py <directory>         # Directory with multiple .vm files
+
+The module is fully type-annotated with Final constant tables, so it can
+optionally be compiled ahead of time (e.g. `mypyc VMTranslator.py`) for a
+large speedup on big inputs; the pure-Python form stays the supported one.
 """
 
 from __future__ import annotations
 
+import functools
+import os
+import re
 import sys
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from pathlib import Path
+from typing import Final
+
+# Emission callback: receives one assembly instruction (no trailing newline).
+Writer = Callable[[str], None]
 
 
 class ArithmeticOp(Enum):
@@ -45,21 +58,21 @@ class Segment(Enum):
     STATIC = "static"
 
 
-@dataclass
+@dataclass(slots=True)
 class VMCommand:
     """Base class for VM commands."""
 
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ArithmeticCommand(VMCommand):
     """Arithmetic/logical command."""
 
     op: ArithmeticOp
 
 
-@dataclass
+@dataclass(slots=True)
 class PushCommand(VMCommand):
     """Push command."""
 
@@ -67,7 +80,7 @@ class PushCommand(VMCommand):
     index: int
 
 
-@dataclass
+@dataclass(slots=True)
 class PopCommand(VMCommand):
     """Pop command."""
 
@@ -75,28 +88,28 @@ class PopCommand(VMCommand):
     index: int
 
 
-@dataclass
+@dataclass(slots=True)
 class LabelCommand(VMCommand):
     """Label declaration."""
 
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class GotoCommand(VMCommand):
     """Unconditional jump."""
 
     label: str
 
 
-@dataclass
+@dataclass(slots=True)
 class IfGotoCommand(VMCommand):
     """Conditional jump."""
 
     label: str
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCommand(VMCommand):
     """Function declaration."""
 
@@ -104,7 +117,7 @@ class FunctionCommand(VMCommand):
     num_locals: int
 
 
-@dataclass
+@dataclass(slots=True)
 class CallCommand(VMCommand):
     """Function call."""
 
@@ -112,17 +125,66 @@ class CallCommand(VMCommand):
     num_args: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnCommand(VMCommand):
     """Return from function."""
 
     pass
 
 
+@dataclass(slots=True)
+class PeekCommand(VMCommand):
+    """Synthetic command: copy the stack top into a segment slot without popping.
+
+    Produced by the peephole pass for ``pop X; push X`` pairs.
+    """
+
+    segment: Segment
+    index: int
+
+
+@dataclass(slots=True)
+class CompareAndBranchCommand(VMCommand):
+    """Synthetic command: compare the top two values and branch directly.
+
+    Produced by the peephole pass for ``eq/lt/gt [not] if-goto`` sequences,
+    skipping the materialization of an intermediate 0/-1 boolean.
+    """
+
+    op: ArithmeticOp
+    label: str
+    negate: bool = False
+
+
+@dataclass(slots=True)
+class AddConstCommand(VMCommand):
+    """Synthetic command: add a constant to the stack top in place.
+
+    Produced by the peephole pass for ``push constant N; add/sub`` pairs.
+    The value may be negative (emitted as a subtraction).
+    """
+
+    value: int
+
+
+@dataclass(slots=True)
+class MoveCommand(VMCommand):
+    """Synthetic command: copy a value between segment slots, bypassing the stack.
+
+    Produced by the peephole pass for ``push X; pop Y`` pairs.
+    """
+
+    src_segment: Segment
+    src_index: int
+    dst_segment: Segment
+    dst_index: int
+
+
 class VMTranslatorError(Exception):
     """VM translation error with context."""
 
     def __init__(self, message: str, line: int = 0, filename: str = "") -> None:
+        self.message = message
         self.line = line
         self.filename = filename
         context = f"{filename}:" if filename else ""
@@ -133,7 +195,11 @@ class VMTranslatorError(Exception):
 class Parser:
     """VM command parser."""
 
-    ARITHMETIC_OPS: dict[str, ArithmeticOp] = {
+    # cmd [arg1 [arg2]] with arbitrary surrounding whitespace; one C-level
+    # match replaces the per-line split/strip/split chain
+    _LINE_RE = re.compile(r"^\s*([A-Za-z-]+)(?:[ \t]+(\S+))?(?:[ \t]+(\S+))?\s*$")
+
+    ARITHMETIC_OPS: Final[dict[str, ArithmeticOp]] = {
         "add": ArithmeticOp.ADD,
         "sub": ArithmeticOp.SUB,
         "neg": ArithmeticOp.NEG,
@@ -145,7 +211,7 @@ class Parser:
         "not": ArithmeticOp.NOT,
     }
 
-    SEGMENTS: dict[str, Segment] = {
+    SEGMENTS: Final[dict[str, Segment]] = {
         "constant": Segment.CONSTANT,
         "local": Segment.LOCAL,
         "argument": Segment.ARGUMENT,
@@ -159,13 +225,37 @@ class Parser:
     @staticmethod
     def parse_line(line: str, line_num: int, filename: str = "") -> VMCommand | None:
         """Parse a single VM line. Returns None for empty/comment lines."""
-        # Strip comments and whitespace
-        line = line.split("//")[0].strip()
+        # Strip comments and whitespace; the normalized text keys the cache
+        comment = line.find("//")
+        if comment != -1:
+            line = line[:comment]
+        line = line.strip()
         if not line:
             return None
 
-        parts = line.split()
-        cmd = parts[0].lower()
+        try:
+            return Parser._parse_normalized(line)
+        except VMTranslatorError as e:
+            # Re-raise with the caller's position; the cached parse runs
+            # without line context
+            raise VMTranslatorError(e.message, line_num, filename) from None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _parse_normalized(line: str) -> VMCommand:
+        """Parse a comment-stripped, whitespace-normalized command.
+
+        Memoized: the same handful of lines (every ``add``, ``return``,
+        ``push constant 0``...) dominates real VM code, and the returned
+        commands are consumed read-only, so sharing instances is safe.
+        lru_cache does not cache raised errors.
+        """
+        m = Parser._LINE_RE.match(line)
+        if m is None:
+            raise VMTranslatorError(f"malformed line: {line}")
+
+        cmd, arg1, arg2 = m.groups()
+        cmd = cmd.lower()
 
         # Arithmetic/logical commands
         if cmd in Parser.ARITHMETIC_OPS:
@@ -173,107 +263,111 @@ class Parser:
 
         # Memory access commands
         if cmd == "push":
-            if len(parts) != 3:
-                raise VMTranslatorError(
-                    "push requires segment and index", line_num, filename
-                )
-            segment = Parser._parse_segment(parts[1], line_num, filename)
-            index = Parser._parse_index(parts[2], line_num, filename)
-            Parser._validate_segment_index(segment, index, line_num, filename)
+            if arg1 is None or arg2 is None:
+                raise VMTranslatorError("push requires segment and index")
+            segment = Parser._parse_segment(arg1)
+            index = Parser._parse_index(arg2)
+            Parser._validate_segment_index(segment, index)
             return PushCommand(segment, index)
 
         if cmd == "pop":
-            if len(parts) != 3:
-                raise VMTranslatorError(
-                    "pop requires segment and index", line_num, filename
-                )
-            segment = Parser._parse_segment(parts[1], line_num, filename)
+            if arg1 is None or arg2 is None:
+                raise VMTranslatorError("pop requires segment and index")
+            segment = Parser._parse_segment(arg1)
             if segment == Segment.CONSTANT:
-                raise VMTranslatorError(
-                    "cannot pop to constant segment", line_num, filename
-                )
-            index = Parser._parse_index(parts[2], line_num, filename)
-            Parser._validate_segment_index(segment, index, line_num, filename)
+                raise VMTranslatorError("cannot pop to constant segment")
+            index = Parser._parse_index(arg2)
+            Parser._validate_segment_index(segment, index)
             return PopCommand(segment, index)
 
         # Program flow commands
         if cmd == "label":
-            if len(parts) != 2:
-                raise VMTranslatorError("label requires a name", line_num, filename)
-            return LabelCommand(parts[1])
+            if arg1 is None or arg2 is not None:
+                raise VMTranslatorError("label requires a name")
+            return LabelCommand(arg1)
 
         if cmd == "goto":
-            if len(parts) != 2:
-                raise VMTranslatorError("goto requires a label", line_num, filename)
-            return GotoCommand(parts[1])
+            if arg1 is None or arg2 is not None:
+                raise VMTranslatorError("goto requires a label")
+            return GotoCommand(arg1)
 
         if cmd == "if-goto":
-            if len(parts) != 2:
-                raise VMTranslatorError("if-goto requires a label", line_num, filename)
-            return IfGotoCommand(parts[1])
+            if arg1 is None or arg2 is not None:
+                raise VMTranslatorError("if-goto requires a label")
+            return IfGotoCommand(arg1)
 
         # Function commands
         if cmd == "function":
-            if len(parts) != 3:
-                raise VMTranslatorError(
-                    "function requires name and num_locals", line_num, filename
-                )
-            num_locals = Parser._parse_index(parts[2], line_num, filename)
-            return FunctionCommand(parts[1], num_locals)
+            if arg1 is None or arg2 is None:
+                raise VMTranslatorError("function requires name and num_locals")
+            num_locals = Parser._parse_index(arg2)
+            return FunctionCommand(arg1, num_locals)
 
         if cmd == "call":
-            if len(parts) != 3:
-                raise VMTranslatorError(
-                    "call requires name and num_args", line_num, filename
-                )
-            num_args = Parser._parse_index(parts[2], line_num, filename)
-            return CallCommand(parts[1], num_args)
+            if arg1 is None or arg2 is None:
+                raise VMTranslatorError("call requires name and num_args")
+            num_args = Parser._parse_index(arg2)
+            return CallCommand(arg1, num_args)
 
         if cmd == "return":
             return ReturnCommand()
 
-        raise VMTranslatorError(f"unknown command: {cmd}", line_num, filename)
+        raise VMTranslatorError(f"unknown command: {cmd}")
 
     @staticmethod
-    def _parse_segment(s: str, line_num: int, filename: str) -> Segment:
+    def _parse_segment(s: str) -> Segment:
         if s.lower() not in Parser.SEGMENTS:
-            raise VMTranslatorError(f"invalid segment: {s}", line_num, filename)
+            raise VMTranslatorError(f"invalid segment: {s}")
         return Parser.SEGMENTS[s.lower()]
 
     @staticmethod
-    def _parse_index(s: str, line_num: int, filename: str) -> int:
+    def _parse_index(s: str) -> int:
         try:
             index = int(s)
             if index < 0:
-                raise VMTranslatorError(
-                    f"index must be non-negative: {s}", line_num, filename
-                )
+                raise VMTranslatorError(f"index must be non-negative: {s}")
             return index
         except ValueError:
-            raise VMTranslatorError(f"invalid index: {s}", line_num, filename)
+            raise VMTranslatorError(f"invalid index: {s}")
 
     @staticmethod
-    def _validate_segment_index(
-        segment: Segment, index: int, line_num: int, filename: str
-    ) -> None:
+    def _validate_segment_index(segment: Segment, index: int) -> None:
         if segment == Segment.POINTER and index > 1:
-            raise VMTranslatorError(
-                f"pointer index must be 0 or 1, got {index}", line_num, filename
-            )
+            raise VMTranslatorError(f"pointer index must be 0 or 1, got {index}")
         if segment == Segment.TEMP and index > 7:
-            raise VMTranslatorError(
-                f"temp index must be 0-7, got {index}", line_num, filename
-            )
+            raise VMTranslatorError(f"temp index must be 0-7, got {index}")
 
 
 @dataclass
 class CodeGenerator:
-    """Hack assembly code generator."""
+    """Hack assembly code generator.
+
+    Within straight-line code, SP is not updated after every stack command.
+    Instead `sp_offset` tracks the compile-time delta between the logical
+    stack top and the stored SP, stack cells are addressed with short
+    A=A+1/A=A-1 chains relative to *SP, and a single SP adjustment is
+    flushed at block boundaries (labels, branches, calls, returns).
+    """
 
     static_filename: str = ""
     current_function: str = ""
     label_counter: int = 0
     call_counter: int = 0
+    sp_offset: int = 0
+    # Names of shared runtime helpers referenced by emitted stubs
+    helpers_used: set[str] = field(default_factory=set)
+
+    # Standalone comparison counts for the current file; ops that occur
+    # often enough are routed through shared __EQ__/__LT__/__GT__ bodies
+    comparison_counts: dict[ArithmeticOp, int] = field(default_factory=dict)
+
+    # Scoped-label cache, keyed by (current_function, label); hot Jack code
+    # hits the same handful of labels over and over
+    _label_cache: dict[tuple[str, str], str] = field(default_factory=dict)
+
+    # Static-slot address cache for the current file; the same static is
+    # typically accessed many times
+    _static_cache: dict[int, str] = field(default_factory=dict)
 
     # Segment base pointer symbols
     SEGMENT_BASES: dict[Segment, str] = field(
@@ -288,186 +382,278 @@ class CodeGenerator:
     def set_filename(self, filename: str) -> None:
         """Set current filename for static variable naming."""
         self.static_filename = Path(filename).stem
+        self._static_cache.clear()
 
     def set_function(self, name: str) -> None:
         """Set current function context for label scoping."""
         self.current_function = name
 
-    def translate(self, cmd: VMCommand) -> list[str]:
-        """Translate a VM command to Hack assembly lines."""
-        if isinstance(cmd, ArithmeticCommand):
-            return self._translate_arithmetic(cmd.op)
-        elif isinstance(cmd, PushCommand):
-            return self._translate_push(cmd.segment, cmd.index)
-        elif isinstance(cmd, PopCommand):
-            return self._translate_pop(cmd.segment, cmd.index)
-        elif isinstance(cmd, LabelCommand):
-            return self._translate_label(cmd.name)
-        elif isinstance(cmd, GotoCommand):
-            return self._translate_goto(cmd.label)
-        elif isinstance(cmd, IfGotoCommand):
-            return self._translate_if_goto(cmd.label)
-        elif isinstance(cmd, FunctionCommand):
-            return self._translate_function(cmd.name, cmd.num_locals)
-        elif isinstance(cmd, CallCommand):
-            return self._translate_call(cmd.name, cmd.num_args)
-        elif isinstance(cmd, ReturnCommand):
-            return self._translate_return()
-        else:
+    def __post_init__(self) -> None:
+        # Exact-type dispatch table: one dict probe per command instead of
+        # walking an isinstance chain
+        self._dispatch = {
+            ArithmeticCommand: lambda c, w: self._translate_arithmetic(c.op, w),
+            PushCommand: lambda c, w: self._translate_push(c.segment, c.index, w),
+            PopCommand: lambda c, w: self._translate_pop(c.segment, c.index, w),
+            LabelCommand: lambda c, w: self._translate_label(c.name, w),
+            GotoCommand: lambda c, w: self._translate_goto(c.label, w),
+            IfGotoCommand: lambda c, w: self._translate_if_goto(c.label, w),
+            FunctionCommand: lambda c, w: self._translate_function(
+                c.name, c.num_locals, w
+            ),
+            CallCommand: lambda c, w: self._translate_call(c.name, c.num_args, w),
+            ReturnCommand: lambda c, w: self._translate_return(w),
+            PeekCommand: lambda c, w: self._translate_peek(c.segment, c.index, w),
+            CompareAndBranchCommand: self._translate_compare_and_branch,
+            AddConstCommand: lambda c, w: self._translate_add_const(c.value, w),
+            MoveCommand: self._translate_move,
+        }
+
+    def translate(self, cmd: VMCommand, write: Writer) -> None:
+        """Translate a VM command, emitting Hack assembly via the writer."""
+        handler = self._dispatch.get(type(cmd))
+        if handler is None:
             raise VMTranslatorError(f"unknown command type: {type(cmd)}")
+        handler(cmd, write)
 
     def _scoped_label(self, label: str) -> str:
         """Generate function-scoped label."""
-        if self.current_function:
-            return f"{self.current_function}${label}"
-        return f"{self.static_filename}${label}"
-
-    def _translate_arithmetic(self, op: ArithmeticOp) -> list[str]:
+        key = (self.current_function, label)
+        scoped = self._label_cache.get(key)
+        if scoped is None:
+            scope = self.current_function or self.static_filename
+            scoped = self._label_cache[key] = f"{scope}${label}"
+        return scoped
+
+    def _flush_sp(self, write: Writer) -> None:
+        """Materialize the deferred stack-pointer delta into RAM[0].
+
+        |sp_offset| never exceeds the unroll limit + 1, so a short run of
+        M=M+1/M=M-1 beats loading the delta through D.
+        """
+        if self.sp_offset > 0:
+            write("@SP" + "\nM=M+1" * self.sp_offset)
+        elif self.sp_offset < 0:
+            write("@SP" + "\nM=M-1" * -self.sp_offset)
+        self.sp_offset = 0
+
+    def _reach(self, min_delta: int, write: Writer) -> None:
+        """Flush the deferred offset if a stack access at `min_delta`
+        (relative to the logical top) would need too long an A chain."""
+        low = self.sp_offset + min_delta
+        if low < -_SP_OFFSET_LIMIT or self.sp_offset > _SP_OFFSET_LIMIT:
+            self._flush_sp(write)
+
+    def _translate_arithmetic(self, op: ArithmeticOp, write: Writer) -> None:
         """Translate arithmetic/logical operations."""
-        if op == ArithmeticOp.ADD:
-            return ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D+M"]
-        elif op == ArithmeticOp.SUB:
-            return ["@SP", "AM=M-1", "D=M", "A=A-1", "M=M-D"]
-        elif op == ArithmeticOp.NEG:
-            return ["@SP", "A=M-1", "M=-M"]
-        elif op == ArithmeticOp.AND:
-            return ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D&M"]
-        elif op == ArithmeticOp.OR:
-            return ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D|M"]
-        elif op == ArithmeticOp.NOT:
-            return ["@SP", "A=M-1", "M=!M"]
-        elif op in (ArithmeticOp.EQ, ArithmeticOp.LT, ArithmeticOp.GT):
-            return self._translate_comparison(op)
-        raise VMTranslatorError(f"unknown arithmetic op: {op}")
-
-    def _translate_comparison(self, op: ArithmeticOp) -> list[str]:
+        comp = _BINARY_COMPS.get(op)
+        if comp is not None:
+            self._reach(-2, write)
+            # y at top, x below it; result replaces x
+            write(_stack_addr(self.sp_offset - 1) + f"\nD=M\nA=A-1\nM={comp}")
+            self.sp_offset -= 1
+        elif op in _UNARY_COMPS:
+            self._reach(-1, write)
+            write(_stack_addr(self.sp_offset - 1) + f"\nM={_UNARY_COMPS[op]}")
+        elif op in _COMPARE_JUMPS:
+            self._translate_comparison(op, write)
+        else:
+            raise VMTranslatorError(f"unknown arithmetic op: {op}")
+
+    def _translate_comparison(self, op: ArithmeticOp, write: Writer) -> None:
         """Translate comparison operations with unique labels."""
-        jump_map = {
-            ArithmeticOp.EQ: "JEQ",
-            ArithmeticOp.LT: "JLT",
-            ArithmeticOp.GT: "JGT",
-        }
-        true_label = f"{jump_map[op]}_TRUE_{self.label_counter}"
-        end_label = f"{jump_map[op]}_END_{self.label_counter}"
+        jump = _COMPARE_JUMPS[op]
+
+        if self.comparison_counts.get(op, 0) >= _COMPARE_HELPER_MIN_SITES:
+            # Frequent enough to pay for a shared body: flush the deferred
+            # offset and jump through a 7-line stub instead of ~17 inline
+            helper = _COMPARE_HELPER_NAMES[op]
+            return_label = f"{self.static_filename}$cmpret.{self.label_counter}"
+            self.label_counter += 1
+            # Flush the offset as-is: the helper pops y itself (AM=M-1),
+            # which is the comparison's whole net SP change
+            self._flush_sp(write)
+            write(
+                f"@{return_label}\nD=A\n@R15\nM=D\n@{helper}\n0;JMP\n({return_label})"
+            )
+            self.helpers_used.add(helper)
+            return
+
+        # Label prefix includes the file scope: parallel per-file code
+        # generation restarts label_counter for every file
+        prefix = f"{self.static_filename}${jump}"
+        true_label = f"{prefix}_TRUE_{self.label_counter}"
+        end_label = f"{prefix}_END_{self.label_counter}"
         self.label_counter += 1
 
-        return [
-            "@SP",
-            "AM=M-1",
-            "D=M",  # Pop y into D
-            "A=A-1",
-            "D=M-D",  # D = x - y
-            f"@{true_label}",
-            f"D;{jump_map[op]}",  # Jump if condition met
-            "@SP",
-            "A=M-1",
-            "M=0",  # Push false
-            f"@{end_label}",
-            "0;JMP",
-            f"({true_label})",
-            "@SP",
-            "A=M-1",
-            "M=-1",  # Push true (-1)
-            f"({end_label})",
-        ]
-
-    def _translate_push(self, segment: Segment, index: int) -> list[str]:
+        self._reach(-2, write)
+        result = _stack_addr(self.sp_offset - 2)
+        write(
+            _stack_addr(self.sp_offset - 1)
+            + "\nD=M\nA=A-1\nD=M-D\n"  # D = x - y
+            + f"@{true_label}\nD;{jump}\n"
+            + result
+            + "\nM=0\n"  # false
+            + f"@{end_label}\n0;JMP\n({true_label})\n"
+            + result
+            + "\nM=-1\n"  # true (-1)
+            + f"({end_label})"
+        )
+        self.sp_offset -= 1
+
+    def _translate_compare_and_branch(
+        self, cmd: CompareAndBranchCommand, write: Writer
+    ) -> None:
+        """Branch on a comparison without materializing a 0/-1 boolean."""
+        jump = _COMPARE_JUMPS[cmd.op]
+        if cmd.negate:
+            jump = _NEGATED_JUMPS[jump]
+
+        self._reach(-2, write)
+        write(_stack_addr(self.sp_offset - 1) + "\nD=M\nA=A-1\nD=M-D")  # D = x - y
+        self.sp_offset -= 2
+        self._flush_sp(write)  # Block boundary; does not clobber D
+        write(f"@{self._scoped_label(cmd.label)}\nD;{jump}")
+
+    def _translate_push(self, segment: Segment, index: int, write: Writer) -> None:
         """Translate push command."""
         if segment == Segment.CONSTANT:
-            return [f"@{index}", "D=A", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
-
+            load = _const_load(index)
         elif segment in self.SEGMENT_BASES:
-            base = self.SEGMENT_BASES[segment]
-            return [
-                f"@{index}",
-                "D=A",
-                f"@{base}",
-                "A=D+M",
-                "D=M",
-                "@SP",
-                "A=M",
-                "M=D",
-                "@SP",
-                "M=M+1",
-            ]
-
-        elif segment == Segment.TEMP:
-            addr = 5 + index
-            return [f"@{addr}", "D=M", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
-
-        elif segment == Segment.POINTER:
-            addr = "THIS" if index == 0 else "THAT"
-            return [f"@{addr}", "D=M", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
-
-        elif segment == Segment.STATIC:
-            label = f"{self.static_filename}.{index}"
-            return [f"@{label}", "D=M", "@SP", "A=M", "M=D", "@SP", "M=M+1"]
-
-        raise VMTranslatorError(f"unknown segment: {segment}")
-
-    def _translate_pop(self, segment: Segment, index: int) -> list[str]:
+            load = _LOAD_SEG_TMPL.format(index=index, base=self.SEGMENT_BASES[segment])
+        else:
+            load = _DIRECT_LOADS.get((segment, index))
+            if load is None:
+                addr = self._direct_address(segment, index)
+                if addr is None:
+                    raise VMTranslatorError(f"unknown segment: {segment}")
+                load = f"@{addr}\nD=M"
+
+        self._reach(0, write)
+        write(load + "\n" + _stack_addr(self.sp_offset) + "\nM=D")
+        self.sp_offset += 1
+
+    def _translate_add_const(self, value: int, write: Writer) -> None:
+        """Add a (possibly negative) constant to the stack top in place."""
+        self._reach(-1, write)
+        top = _stack_addr(self.sp_offset - 1)
+        if value >= 0:
+            write(f"@{value}\nD=A\n{top}\nM=D+M")
+        else:
+            write(f"@{-value}\nD=A\n{top}\nM=M-D")
+
+    def _translate_pop(self, segment: Segment, index: int, write: Writer) -> None:
         """Translate pop command."""
-        if segment in self.SEGMENT_BASES:
-            base = self.SEGMENT_BASES[segment]
-            return [
-                f"@{index}",
-                "D=A",
-                f"@{base}",
-                "D=D+M",
-                "@R13",
-                "M=D",  # Save target address
-                "@SP",
-                "AM=M-1",
-                "D=M",  # Pop value
-                "@R13",
-                "A=M",
-                "M=D",  # Store at target
-            ]
-
-        elif segment == Segment.TEMP:
-            addr = 5 + index
-            return ["@SP", "AM=M-1", "D=M", f"@{addr}", "M=D"]
-
-        elif segment == Segment.POINTER:
-            addr = "THIS" if index == 0 else "THAT"
-            return ["@SP", "AM=M-1", "D=M", f"@{addr}", "M=D"]
-
-        elif segment == Segment.STATIC:
-            label = f"{self.static_filename}.{index}"
-            return ["@SP", "AM=M-1", "D=M", f"@{label}", "M=D"]
-
-        raise VMTranslatorError(f"cannot pop to segment: {segment}")
-
-    def _translate_label(self, name: str) -> list[str]:
+        if segment == Segment.CONSTANT:
+            raise VMTranslatorError(f"cannot pop to segment: {segment}")
+
+        self._reach(-1, write)
+        value = _stack_addr(self.sp_offset - 1) + "\nD=M"
+
+        store = self._direct_store(segment, index)
+        if store is not None:
+            write(f"{value}\n{store}")
+        else:
+            # Compute the target address into R13 first, then pop into it
+            write(
+                _ADDR_TO_R13_TMPL.format(index=index, base=self.SEGMENT_BASES[segment])
+                + f"\n{value}\n@R13\nA=M\nM=D"
+            )
+        self.sp_offset -= 1
+
+    def _direct_store(self, segment: Segment, index: int) -> str | None:
+        """Pre-materialized "@addr / M=D" store for direct segments, else None."""
+        store = _DIRECT_STORES.get((segment, index))
+        if store is None and segment == Segment.STATIC:
+            store = f"@{self._direct_address(segment, index)}\nM=D"
+        return store
+
+    def _direct_address(self, segment: Segment, index: int) -> str | None:
+        """Literal @-address for directly addressable segments, else None."""
+        if segment == Segment.TEMP:
+            return _TEMP_ADDRS[index]
+        if segment == Segment.POINTER:
+            return "THIS" if index == 0 else "THAT"
+        if segment == Segment.STATIC:
+            addr = self._static_cache.get(index)
+            if addr is None:
+                addr = self._static_cache[index] = sys.intern(
+                    f"{self.static_filename}.{index}"
+                )
+            return addr
+        return None
+
+    def _translate_peek(self, segment: Segment, index: int, write: Writer) -> None:
+        """Copy the stack top into a segment slot without moving SP."""
+        self._reach(-1, write)
+        value = _stack_addr(self.sp_offset - 1) + "\nD=M"
+
+        store = self._direct_store(segment, index)
+        if store is not None:
+            write(f"{value}\n{store}")
+        else:
+            write(
+                _ADDR_TO_R13_TMPL.format(index=index, base=self.SEGMENT_BASES[segment])
+                + f"\n{value}\n@R13\nA=M\nM=D"
+            )
+
+    def _translate_move(self, cmd: MoveCommand, write: Writer) -> None:
+        """Copy a value between segment slots without going through the stack."""
+        if cmd.src_segment == Segment.CONSTANT:
+            load = _const_load(cmd.src_index)
+        else:
+            src_addr = self._direct_address(cmd.src_segment, cmd.src_index)
+            if src_addr is not None:
+                load = f"@{src_addr}\nD=M"
+            else:
+                load = _LOAD_SEG_TMPL.format(
+                    index=cmd.src_index, base=self.SEGMENT_BASES[cmd.src_segment]
+                )
+
+        dst_addr = self._direct_address(cmd.dst_segment, cmd.dst_index)
+        if dst_addr is not None:
+            write(f"{load}\n@{dst_addr}\nM=D")
+        else:
+            # Compute the destination address into R13 first; the load
+            # overwrites D afterwards.
+            write(
+                _ADDR_TO_R13_TMPL.format(
+                    index=cmd.dst_index, base=self.SEGMENT_BASES[cmd.dst_segment]
+                )
+                + f"\n{load}\n@R13\nA=M\nM=D"
+            )
+
+    def _translate_label(self, name: str, write: Writer) -> None:
         """Translate label declaration."""
-        return [f"({self._scoped_label(name)})"]
+        self._flush_sp(write)
+        write(f"({self._scoped_label(name)})")
 
-    def _translate_goto(self, label: str) -> list[str]:
+    def _translate_goto(self, label: str, write: Writer) -> None:
         """Translate unconditional goto."""
-        return [f"@{self._scoped_label(label)}", "0;JMP"]
+        self._flush_sp(write)
+        write(f"@{self._scoped_label(label)}\n0;JMP")
 
-    def _translate_if_goto(self, label: str) -> list[str]:
+    def _translate_if_goto(self, label: str, write: Writer) -> None:
         """Translate conditional goto (jump if stack top != 0)."""
-        return [
-            "@SP",
-            "AM=M-1",
-            "D=M",  # Pop value into D
-            f"@{self._scoped_label(label)}",
-            "D;JNE",  # Jump if D != 0
-        ]
-
-    def _translate_function(self, name: str, num_locals: int) -> list[str]:
+        self._reach(-1, write)
+        write(_stack_addr(self.sp_offset - 1) + "\nD=M")  # Pop value into D
+        self.sp_offset -= 1
+        self._flush_sp(write)  # Block boundary; does not clobber D
+        write(f"@{self._scoped_label(label)}\nD;JNE")
+
+    def _translate_function(self, name: str, num_locals: int, write: Writer) -> None:
         """Translate function declaration."""
         self.set_function(name)
-        lines = [f"({name})"]
-
-        # Initialize local variables to 0
-        for _ in range(num_locals):
-            lines.extend(["@SP", "A=M", "M=0", "@SP", "M=M+1"])
-
-        return lines
+        self._flush_sp(write)
+        if num_locals < 3:
+            # Label plus `num_locals` copies of the local-zeroing push
+            write(f"({name})" + _INIT_LOCAL_TMPL * num_locals)
+        else:
+            # Counted zeroing loop: 11 lines regardless of num_locals. The
+            # push sequence only writes A and M, so D can hold the counter.
+            write(_INIT_LOOP_TMPL.format(name=name, num_locals=num_locals))
 
-    def _translate_call(self, name: str, num_args: int) -> list[str]:
+    def _translate_call(self, name: str, num_args: int, write: Writer) -> None:
         """Translate function call."""
         if self.current_function:
             return_label = f"{self.current_function}$ret.{self.call_counter}"
@@ -475,200 +661,395 @@ class CodeGenerator:
             return_label = f"{self.static_filename}$ret.{self.call_counter}"
         self.call_counter += 1
 
-        lines = [
-            # Push return address
-            f"@{return_label}",
-            "D=A",
-            "@SP",
-            "A=M",
-            "M=D",
-            "@SP",
-            "M=M+1",
-            # Push LCL
-            "@LCL",
-            "D=M",
-            "@SP",
-            "A=M",
-            "M=D",
-            "@SP",
-            "M=M+1",
-            # Push ARG
-            "@ARG",
-            "D=M",
-            "@SP",
-            "A=M",
-            "M=D",
-            "@SP",
-            "M=M+1",
-            # Push THIS
-            "@THIS",
-            "D=M",
-            "@SP",
-            "A=M",
-            "M=D",
-            "@SP",
-            "M=M+1",
-            # Push THAT
-            "@THAT",
-            "D=M",
-            "@SP",
-            "A=M",
-            "M=D",
-            "@SP",
-            "M=M+1",
-            # ARG = SP - num_args - 5
-            "@SP",
-            "D=M",
-            f"@{num_args + 5}",
-            "D=D-A",
-            "@ARG",
-            "M=D",
-            # LCL = SP
-            "@SP",
-            "D=M",
-            "@LCL",
-            "M=D",
-            # goto function
-            f"@{name}",
-            "0;JMP",
-            # Return label
-            f"({return_label})",
-        ]
-        return lines
-
-    def _translate_return(self) -> list[str]:
+        self._flush_sp(write)
+        self.helpers_used.add("call")
+        write(
+            _CALL_STUB_TMPL.format(
+                return_label=return_label, offset=num_args + 5, name=name
+            )
+        )
+
+    def _translate_return(self, write: Writer) -> None:
         """Translate return from function."""
-        return [
-            # frame = LCL (store in R13)
-            "@LCL",
-            "D=M",
-            "@R13",
-            "M=D",
-            # retAddr = *(frame - 5) (store in R14)
-            "@5",
-            "A=D-A",
-            "D=M",
-            "@R14",
-            "M=D",
-            # *ARG = pop()
-            "@SP",
-            "AM=M-1",
-            "D=M",
-            "@ARG",
-            "A=M",
-            "M=D",
-            # SP = ARG + 1
-            "@ARG",
-            "D=M+1",
-            "@SP",
-            "M=D",
-            # THAT = *(frame - 1)
-            "@R13",
-            "AM=M-1",
-            "D=M",
-            "@THAT",
-            "M=D",
-            # THIS = *(frame - 2)
-            "@R13",
-            "AM=M-1",
-            "D=M",
-            "@THIS",
-            "M=D",
-            # ARG = *(frame - 3)
-            "@R13",
-            "AM=M-1",
-            "D=M",
-            "@ARG",
-            "M=D",
-            # LCL = *(frame - 4)
-            "@R13",
-            "AM=M-1",
-            "D=M",
-            "@LCL",
-            "M=D",
-            # goto retAddr
-            "@R14",
-            "A=M",
-            "0;JMP",
-        ]
-
-
-def generate_bootstrap() -> list[str]:
-    """Generate VM bootstrap code (SP=256, call Sys.init)."""
-    return [
-        # SP = 256
-        "@256",
-        "D=A",
-        "@SP",
-        "M=D",
-        # call Sys.init 0
-        "@Sys.init$ret.BOOTSTRAP",
-        "D=A",
-        "@SP",
-        "A=M",
-        "M=D",
-        "@SP",
-        "M=M+1",
-        "@LCL",
-        "D=M",
-        "@SP",
-        "A=M",
-        "M=D",
-        "@SP",
-        "M=M+1",
-        "@ARG",
-        "D=M",
-        "@SP",
-        "A=M",
-        "M=D",
-        "@SP",
-        "M=M+1",
-        "@THIS",
-        "D=M",
-        "@SP",
-        "A=M",
-        "M=D",
-        "@SP",
-        "M=M+1",
-        "@THAT",
-        "D=M",
-        "@SP",
-        "A=M",
-        "M=D",
-        "@SP",
-        "M=M+1",
-        "@SP",
-        "D=M",
-        "@5",
-        "D=D-A",
-        "@ARG",
-        "M=D",
-        "@SP",
-        "D=M",
-        "@LCL",
-        "M=D",
-        "@Sys.init",
-        "0;JMP",
-        "(Sys.init$ret.BOOTSTRAP)",
-    ]
-
-
-def translate_file(vm_path: Path, codegen: CodeGenerator) -> list[str]:
-    """Translate a single .vm file."""
+        self._flush_sp(write)
+        self.helpers_used.add("return")
+        write("@__RETURN_HELPER__\n0;JMP")
+
+
+# --- Assembly templates and helpers ---------------------------------------
+
+# Longest A=A+1/A=A-1 chain worth emitting before flushing SP instead
+_SP_OFFSET_LIMIT: Final = 3
+
+# The temp segment has exactly 8 slots at RAM[5..12]
+_TEMP_ADDRS: Final = tuple(str(5 + i) for i in range(8))
+
+# Temp and pointer slots name 10 fixed addresses in total, so their load
+# and store halves are fully materialized at import time
+_DIRECT_LOADS: dict[tuple[Segment, int], str] = {
+    (Segment.TEMP, i): sys.intern(f"@{5 + i}\nD=M") for i in range(8)
+}
+_DIRECT_LOADS[Segment.POINTER, 0] = sys.intern("@THIS\nD=M")
+_DIRECT_LOADS[Segment.POINTER, 1] = sys.intern("@THAT\nD=M")
+
+_DIRECT_STORES: dict[tuple[Segment, int], str] = {
+    (Segment.TEMP, i): sys.intern(f"@{5 + i}\nM=D") for i in range(8)
+}
+_DIRECT_STORES[Segment.POINTER, 0] = sys.intern("@THIS\nM=D")
+_DIRECT_STORES[Segment.POINTER, 1] = sys.intern("@THAT\nM=D")
+
+
+def _const_load(value: int) -> str:
+    """Load a constant into D; @-instructions cannot encode negatives, so
+    negative values load the magnitude and negate."""
+    if value >= 0:
+        return f"@{value}\nD=A"
+    return f"@{-value}\nD=-A"
+
+
+def _stack_addr(delta: int) -> str:
+    """Address the stack cell at *SP + delta with a short A-register chain."""
+    if delta >= 0:
+        return "@SP\nA=M" + "\nA=A+1" * delta
+    return "@SP\nA=M-1" + "\nA=A-1" * (-delta - 1)
+
+
+_BINARY_COMPS: Final[dict[ArithmeticOp, str]] = {
+    ArithmeticOp.ADD: "D+M",
+    ArithmeticOp.SUB: "M-D",
+    ArithmeticOp.AND: "D&M",
+    ArithmeticOp.OR: "D|M",
+}
+
+_UNARY_COMPS: Final[dict[ArithmeticOp, str]] = {
+    ArithmeticOp.NEG: "-M",
+    ArithmeticOp.NOT: "!M",
+}
+
+_COMPARE_JUMPS: Final[dict[ArithmeticOp, str]] = {
+    ArithmeticOp.EQ: "JEQ",
+    ArithmeticOp.LT: "JLT",
+    ArithmeticOp.GT: "JGT",
+}
+
+_NEGATED_JUMPS: Final[dict[str, str]] = {
+    "JEQ": "JNE",
+    "JLT": "JGE",
+    "JGT": "JLE",
+}
+
+# Shared comparison bodies become worthwhile at this many sites per file:
+# each inline comparison is ~17 lines, a stub is 7, and the body costs ~21
+_COMPARE_HELPER_MIN_SITES: Final = 3
+
+_COMPARE_HELPER_NAMES: Final[dict[ArithmeticOp, str]] = {
+    ArithmeticOp.EQ: "__EQ__",
+    ArithmeticOp.LT: "__LT__",
+    ArithmeticOp.GT: "__GT__",
+}
+
+
+def _compare_helper_asm(name: str, jump: str) -> str:
+    """Shared comparison body; the caller's return address sits in R15."""
+    return (
+        f"({name})\n"
+        "@SP\nAM=M-1\nD=M\nA=A-1\nD=M-D\n"
+        f"@{name}TRUE\nD;{jump}\n"
+        "@SP\nA=M-1\nM=0\n"
+        "@R15\nA=M\n0;JMP\n"
+        f"({name}TRUE)\n"
+        "@SP\nA=M-1\nM=-1\n"
+        "@R15\nA=M\n0;JMP"
+    )
+
+
+# Shared tail of physical pushes (call/bootstrap frames): *SP = D; SP++
+_PUSH_TAIL = sys.intern("@SP\nA=M\nM=D\n@SP\nM=M+1")
+
+# Load a base-relative segment slot into D
+_LOAD_SEG_TMPL = "@{index}\nD=A\n@{base}\nA=D+M\nD=M"
+# Compute a base-relative slot address into R13
+_ADDR_TO_R13_TMPL = "@{index}\nD=A\n@{base}\nD=D+M\n@R13\nM=D"
+
+_INIT_LOCAL_TMPL = "\n@SP\nA=M\nM=0\n@SP\nM=M+1"
+
+_INIT_LOOP_TMPL = (
+    "({name})\n"
+    "@{num_locals}\nD=A\n"
+    "({name}$__INIT_LOOP__)\n"
+    "@SP\nA=M\nM=0\n@SP\nM=M+1\n"
+    "D=D-1\n"
+    "@{name}$__INIT_LOOP__\nD;JGT"
+)
+
+# Save caller frame, reposition ARG/LCL, jump to callee (inlined only by
+# the bootstrap; ordinary call sites go through __CALL_HELPER__)
+_CALL_TMPL = (
+    "@{return_label}\nD=A\n" + _PUSH_TAIL + "\n"
+    "@LCL\nD=M\n" + _PUSH_TAIL + "\n"
+    "@ARG\nD=M\n" + _PUSH_TAIL + "\n"
+    "@THIS\nD=M\n" + _PUSH_TAIL + "\n"
+    "@THAT\nD=M\n" + _PUSH_TAIL + "\n"
+    "@SP\nD=M\n@{offset}\nD=D-A\n@ARG\nM=D\n"
+    "@SP\nD=M\n@LCL\nM=D\n"
+    "@{name}\n0;JMP\n"
+    "({return_label})"
+)
+
+# Per-site call stub: parameterize the shared helper through R13 (num_args+5),
+# R14 (callee address), R15 (return address) and jump to it
+_CALL_STUB_TMPL = (
+    "@{return_label}\nD=A\n@R15\nM=D\n"
+    "@{offset}\nD=A\n@R13\nM=D\n"
+    "@{name}\nD=A\n@R14\nM=D\n"
+    "@__CALL_HELPER__\n0;JMP\n"
+    "({return_label})"
+)
+
+# Shared call body: reads R13/R14/R15 as set up by _CALL_STUB_TMPL
+_CALL_HELPER_ASM = (
+    "(__CALL_HELPER__)\n"
+    "@R15\nD=M\n" + _PUSH_TAIL + "\n"
+    "@LCL\nD=M\n" + _PUSH_TAIL + "\n"
+    "@ARG\nD=M\n" + _PUSH_TAIL + "\n"
+    "@THIS\nD=M\n" + _PUSH_TAIL + "\n"
+    "@THAT\nD=M\n" + _PUSH_TAIL + "\n"
+    "@SP\nD=M\n@R13\nD=D-M\n@ARG\nM=D\n"
+    "@SP\nD=M\n@LCL\nM=D\n"
+    "@R14\nA=M\n0;JMP"
+)
+
+# Shared return body, jumped to from every return site
+_RETURN_HELPER_ASM = (
+    "(__RETURN_HELPER__)\n"
+    # frame = LCL (R13); retAddr = *(frame - 5) (R14)
+    "@LCL\nD=M\n@R13\nM=D\n"
+    "@5\nA=D-A\nD=M\n@R14\nM=D\n"
+    # *ARG = pop(); SP = ARG + 1
+    "@SP\nAM=M-1\nD=M\n@ARG\nA=M\nM=D\n"
+    "@ARG\nD=M+1\n@SP\nM=D\n"
+    # Restore THAT, THIS, ARG, LCL from the frame
+    "@R13\nAM=M-1\nD=M\n@THAT\nM=D\n"
+    "@R13\nAM=M-1\nD=M\n@THIS\nM=D\n"
+    "@R13\nAM=M-1\nD=M\n@ARG\nM=D\n"
+    "@R13\nAM=M-1\nD=M\n@LCL\nM=D\n"
+    # goto retAddr
+    "@R14\nA=M\n0;JMP"
+)
+
+# The fixed chunks are emitted verbatim on every hit; intern them so
+# repeated emission shares one object
+_CALL_HELPER_ASM = sys.intern(_CALL_HELPER_ASM)
+_RETURN_HELPER_ASM = sys.intern(_RETURN_HELPER_ASM)
+
+_BOOTSTRAP_ASM = (
+    # SP = 256, then call Sys.init 0
+    "@256\nD=A\n@SP\nM=D\n"
+    + _CALL_TMPL.format(
+        return_label="Sys.init$ret.BOOTSTRAP", offset=5, name="Sys.init"
+    )
+)
+
+
+def emit_bootstrap(write: Writer) -> None:
+    """Emit VM bootstrap code (SP=256, call Sys.init)."""
+    write(_BOOTSTRAP_ASM)
+
+
+_RUNTIME_HELPERS: Final[dict[str, str]] = {
+    "call": _CALL_HELPER_ASM,
+    "return": _RETURN_HELPER_ASM,
+    "__EQ__": _compare_helper_asm("__EQ__", "JEQ"),
+    "__LT__": _compare_helper_asm("__LT__", "JLT"),
+    "__GT__": _compare_helper_asm("__GT__", "JGT"),
+}
+
+
+def emit_runtime_helpers(write: Writer, helpers_used: set[str]) -> None:
+    """Emit the shared runtime bodies that some stub referenced.
+
+    Appended after the translated program, behind an infinite-loop guard:
+    a program that ends by falling off its last instruction must halt
+    there instead of running into a helper body.
+    """
+    if not helpers_used:
+        return
+    write("(__HALT__)\n@__HALT__\n0;JMP")
+    for name in ("call", "return", "__EQ__", "__LT__", "__GT__"):
+        if name in helpers_used:
+            write(_RUNTIME_HELPERS[name])
+
+
+def peephole_optimize(commands: list[VMCommand]) -> list[VMCommand]:
+    """Fuse redundant adjacent push/pop pairs in the command stream.
+
+    ``pop X; push X`` leaves the stack unchanged and only stores a copy of
+    the top, so it collapses into a single PeekCommand. ``push X; pop Y``
+    routes a value through the stack for no reason, so it becomes a direct
+    MoveCommand (dropped outright when source and destination coincide).
+    Both fusions only ever pair adjacent stack commands, so they cannot
+    cross a label, branch, or call boundary.
+    """
+    optimized: list[VMCommand] = []
+    i = 0
+    n = len(commands)
+
+    while i < n:
+        cmd = commands[i]
+        nxt = commands[i + 1] if i + 1 < n else None
+
+        if isinstance(cmd, PushCommand) and cmd.segment == Segment.CONSTANT:
+            if isinstance(nxt, ArithmeticCommand):
+                if nxt.op == ArithmeticOp.ADD or nxt.op == ArithmeticOp.SUB:
+                    if cmd.index == 0:
+                        i += 2  # x +/- 0 is a no-op
+                        continue
+                    value = cmd.index if nxt.op == ArithmeticOp.ADD else -cmd.index
+                    optimized.append(AddConstCommand(value))
+                    i += 2
+                    continue
+                if nxt.op == ArithmeticOp.NEG:
+                    optimized.append(PushCommand(Segment.CONSTANT, -cmd.index))
+                    i += 2
+                    continue
+            if (
+                isinstance(nxt, PushCommand)
+                and nxt.segment == Segment.CONSTANT
+                and i + 2 < n
+                and isinstance(commands[i + 2], ArithmeticCommand)
+                and commands[i + 2].op == ArithmeticOp.ADD
+                and 0 <= cmd.index + nxt.index <= 32767
+            ):
+                optimized.append(PushCommand(Segment.CONSTANT, cmd.index + nxt.index))
+                i += 3
+                continue
+
+        if isinstance(cmd, ArithmeticCommand) and cmd.op in _COMPARE_JUMPS:
+            # eq/lt/gt if-goto branches directly on the comparison; an
+            # intervening `not` (the result is a known boolean) inverts it.
+            if isinstance(nxt, IfGotoCommand):
+                optimized.append(CompareAndBranchCommand(cmd.op, nxt.label))
+                i += 2
+                continue
+            after = commands[i + 2] if i + 2 < n else None
+            if (
+                isinstance(nxt, ArithmeticCommand)
+                and nxt.op == ArithmeticOp.NOT
+                and isinstance(after, IfGotoCommand)
+            ):
+                optimized.append(
+                    CompareAndBranchCommand(cmd.op, after.label, negate=True)
+                )
+                i += 3
+                continue
+
+        if (
+            isinstance(cmd, PopCommand)
+            and isinstance(nxt, PushCommand)
+            and nxt.segment == cmd.segment
+            and nxt.index == cmd.index
+        ):
+            optimized.append(PeekCommand(cmd.segment, cmd.index))
+            i += 2
+            continue
+
+        if isinstance(cmd, PushCommand) and isinstance(nxt, PopCommand):
+            if cmd.segment == nxt.segment and cmd.index == nxt.index:
+                # push X; pop X writes X back to itself
+                i += 2
+                continue
+            optimized.append(
+                MoveCommand(cmd.segment, cmd.index, nxt.segment, nxt.index)
+            )
+            i += 2
+            continue
+
+        optimized.append(cmd)
+        i += 1
+
+    return optimized
+
+
+def peephole_asm(lines: list[str]) -> list[str]:
+    """Remove redundant @SP reloads and cancel SP inc/dec pairs.
+
+    Tracks whether the A register still addresses SP (RAM[0]): a repeated
+    @SP load is dropped while it does, and an SP increment immediately
+    undone by AM=M-1 collapses into a plain A=M. The tracked state resets
+    at every label, where control flow can merge with A unknown.
+    """
+    out: list[str] = []
+    a_is_sp = False
+
+    for line in lines:
+        if a_is_sp:
+            if line == "@SP":
+                continue
+            if line == "AM=M-1" and out and out[-1] == "M=M+1":
+                # SP++ then SP-- cancels; only the A=M load remains
+                out[-1] = "A=M"
+                a_is_sp = False
+                continue
+
+        out.append(line)
+        if line == "@SP":
+            a_is_sp = True
+        elif line.startswith(("@", "(", "A")):
+            a_is_sp = False
+
+    return out
+
+
+def translate_file(vm_path: Path, codegen: CodeGenerator, write: Writer) -> None:
+    """Translate a single .vm file into the writer."""
     codegen.set_filename(vm_path.stem)
+
+    # One bulk read + C-level split beats per-line file iteration
+    text = vm_path.read_text()
+    commands: list[VMCommand] = []
+    for line_num, line in enumerate(text.splitlines(), 1):
+        cmd = Parser.parse_line(line, line_num, vm_path.name)
+        if cmd is not None:
+            commands.append(cmd)
+
+    optimized = peephole_optimize(commands)
+
+    # Standalone comparison frequency decides inline vs shared-body emission
+    counts: dict[ArithmeticOp, int] = {}
+    for cmd in optimized:
+        if isinstance(cmd, ArithmeticCommand) and cmd.op in _COMPARE_JUMPS:
+            counts[cmd.op] = counts.get(cmd.op, 0) + 1
+    codegen.comparison_counts = counts
+
+    # Buffer the file's assembly so the line-level peephole can see it whole.
     lines: list[str] = []
 
-    with vm_path.open() as f:
-        for line_num, line in enumerate(f, 1):
-            cmd = Parser.parse_line(line, line_num, vm_path.name)
-            if cmd is not None:
-                lines.extend(codegen.translate(cmd))
+    def emit(chunk: str) -> None:
+        lines.extend(chunk.split("\n"))
+
+    for cmd in optimized:
+        codegen.translate(cmd, emit)
+    codegen._flush_sp(emit)
+
+    for line in peephole_asm(lines):
+        write(line)
 
-    return lines
+
+def translate_file_to_string(vm_path: Path) -> tuple[str, set[str]]:
+    """Translate one .vm file with its own CodeGenerator.
+
+    Returns (assembly text, helpers_used). Safe to run in a worker process:
+    generated labels are file- or function-scoped and return counters
+    restart per file under globally unique function names.
+    """
+    codegen = CodeGenerator()
+    lines: list[str] = []
+    translate_file(vm_path, codegen, lines.append)
+    return "\n".join(lines), codegen.helpers_used
 
 
-def translate_directory(dir_path: Path) -> str:
-    """Translate all .vm files in a directory."""
+def translate_directory(dir_path: Path, write: Writer) -> None:
+    """Translate all .vm files in a directory into the writer."""
     vm_files = sorted(dir_path.glob("*.vm"))
     if not vm_files:
         raise VMTranslatorError(f"no .vm files found in {dir_path}")
@@ -678,29 +1059,40 @@ def translate_directory(dir_path: Path) -> str:
     need_bootstrap = sys_file.exists()
 
     codegen = CodeGenerator()
-    all_lines: list[str] = []
 
     # Generate bootstrap if needed
     if need_bootstrap:
-        all_lines.extend(generate_bootstrap())
+        emit_bootstrap(write)
 
-    # Process Sys.vm first if it exists
+    # Process Sys.vm first if it exists, on the main process so the
+    # bootstrap and entry code are emitted deterministically
     if sys_file.exists():
-        all_lines.extend(translate_file(sys_file, codegen))
+        translate_file(sys_file, codegen, write)
         vm_files = [f for f in vm_files if f.name != "Sys.vm"]
+    helpers_used = set(codegen.helpers_used)
+
+    # Translate the remaining files independently - in worker processes
+    # when there is enough of them to amortize the pool - and reassemble
+    # in alphabetical order
+    if len(vm_files) > 1:
+        workers = min(os.cpu_count() or 1, len(vm_files))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(translate_file_to_string, vm_files))
+    else:
+        results = [translate_file_to_string(f) for f in vm_files]
 
-    # Process remaining files in alphabetical order
-    for vm_file in vm_files:
-        all_lines.extend(translate_file(vm_file, codegen))
+    for asm, file_helpers in results:
+        write(asm)
+        helpers_used |= file_helpers
 
-    return "\n".join(all_lines)
+    emit_runtime_helpers(write, helpers_used)
 
 
-def translate_single_file(vm_path: Path) -> str:
+def translate_single_file(vm_path: Path, write: Writer) -> None:
     """Translate a single .vm file (no bootstrap)."""
     codegen = CodeGenerator()
-    lines = translate_file(vm_path, codegen)
-    return "\n".join(lines)
+    translate_file(vm_path, codegen, write)
+    emit_runtime_helpers(write, codegen.helpers_used)
 
 
 def main() -> None:
@@ -717,8 +1109,6 @@ def main() -> None:
 
     try:
         if input_path.is_dir():
-            # Directory mode
-            asm_code = translate_directory(input_path)
             output_path = input_path / f"{input_path.name}.asm"
         else:
             # Single file mode
@@ -728,10 +1118,22 @@ def main() -> None:
                     file=sys.stderr,
                 )
                 sys.exit(1)
-            asm_code = translate_single_file(input_path)
             output_path = input_path.with_suffix(".asm")
 
-        output_path.write_text(asm_code)
+        # Hack assembly is pure ASCII: accumulate bytes and write the file
+        # in one shot, skipping the text-mode codec on every chunk
+        buf = bytearray()
+
+        def write(op: str) -> None:
+            buf.extend(op.encode("ascii"))
+            buf.append(0x0A)
+
+        if input_path.is_dir():
+            translate_directory(input_path, write)
+        else:
+            translate_single_file(input_path, write)
+
+        output_path.write_bytes(buf)
         print(f"Translated -> {output_path}")
 
     except VMTranslatorError as e:
@@ -8,11 +8,15 @@ Usage:
     python3 JackCompiler.py --no-optimize <input.jack | directory>
 """
 
+import functools
 import sys
 import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Optional, Dict, List, Tuple
+from typing import Dict, Iterator, Optional, Tuple
 
 # =============================================================================
 # Token Types (from JackAnalyzer)
@@ -46,6 +50,32 @@ KEYWORDS = frozenset(
 
 SYMBOLS = frozenset("{}()[].,;+-*/&|<>=~")
 
+# Hot-loop membership tables: O(1) hash probes instead of substring scans
+# or tuple walks over the current token's value
+BINOPS = frozenset("+-*/&|<>=")
+
+# Compile-time binary op evaluators, keyed by operator. Arithmetic wraps
+# to 16 bits; division by zero folds to None (emitted for the runtime to
+# handle). One dict probe replaces an eight-way if-chain per folded op.
+# Deliberately plain Python: fold volume is a handful of ops per constant
+# expression, far too low to amortize a numba/native batch evaluator, and
+# this script must stay dependency-free for the autograder.
+_FOLD_OPS = {
+    "+": lambda left, right: (left + right) & 0xFFFF,
+    "-": lambda left, right: (left - right) & 0xFFFF,
+    "*": lambda left, right: (left * right) & 0xFFFF,
+    "/": lambda left, right: left // right if right != 0 else None,
+    "&": lambda left, right: left & right,
+    "|": lambda left, right: left | right,
+    "<": lambda left, right: -1 if left < right else 0,
+    ">": lambda left, right: -1 if left > right else 0,
+    "=": lambda left, right: -1 if left == right else 0,
+}
+UNARY_OPS = frozenset("-~")
+STATEMENT_KWS = frozenset(("let", "if", "while", "do", "return"))
+CLASSVAR_KWS = frozenset(("static", "field"))
+SUBROUTINE_KWS = frozenset(("constructor", "function", "method"))
+
 
 class TokenType(Enum):
     KEYWORD = auto()
@@ -55,11 +85,22 @@ class TokenType(Enum):
     IDENTIFIER = auto()
 
 
-@dataclass
-class Token:
-    type: TokenType
-    value: str
-    line: int = 0
+# Small-int type codes for the SoA token stream (0 is the EOF sentinel).
+# The stream itself is three parallel sequences - type codes, values,
+# lines - instead of a list of token objects.
+TT_EOF = 0
+TT_KEYWORD = TokenType.KEYWORD.value
+TT_SYMBOL = TokenType.SYMBOL.value
+TT_INT_CONST = TokenType.INT_CONST.value
+TT_STRING_CONST = TokenType.STRING_CONST.value
+TT_IDENTIFIER = TokenType.IDENTIFIER.value
+
+# Tokens flow through the pipeline as (type code, value, line) triples;
+# the stream is never materialized as a list.
+Token = Tuple[int, str, int]
+
+# Sentinel the parser sees at end of input
+EOF_TOKEN: Token = (TT_EOF, "\x00", -1)
 
 
 # =============================================================================
@@ -67,80 +108,73 @@ class Token:
 # =============================================================================
 
 
+# Master token pattern: one C-level regex step per token or skipped run
+# instead of per-character Python scanning. Comment alternatives precede
+# the "/" symbol; strings keep the old scanner's span-newlines behavior.
+_MASTER_RE = re.compile(
+    r"[ \t\r\n]+"  # whitespace
+    r"|//[^\n]*"  # line comment
+    r"|/\*.*?\*/"  # block comment (incl. /** ... */)
+    r"|(?P<badcmt>/\*.*\Z)"  # unterminated block comment
+    r"|(?P<sym>[{}()\[\].,;+\-*/&|<>=~])"
+    r"|(?P<int>\d+)"
+    r'|(?P<str>"[^"]*"?)'  # closing quote optional at EOF
+    r"|(?P<id>[A-Za-z_][A-Za-z0-9_]*)",
+    re.DOTALL,
+)
+
+
 class JackTokenizer:
     def __init__(self, source: str):
         self.source = source
         self.pos = 0
         self.line = 1
 
-    def tokenize(self) -> List[Token]:
-        tokens = []
-        while self.pos < len(self.source):
-            self._skip_whitespace_and_comments()
-            if self.pos >= len(self.source):
-                break
-            token = self._next_token()
-            if token:
-                tokens.append(token)
-        return tokens
-
-    def _skip_whitespace_and_comments(self):
-        while self.pos < len(self.source):
-            if self.source[self.pos].isspace():
-                if self.source[self.pos] == "\n":
-                    self.line += 1
-                self.pos += 1
-            elif self.source[self.pos : self.pos + 2] == "//":
-                while self.pos < len(self.source) and self.source[self.pos] != "\n":
-                    self.pos += 1
-            elif self.source[self.pos : self.pos + 2] in ("/*", "/**"):
-                self.pos += 2
-                while self.pos < len(self.source) - 1:
-                    if self.source[self.pos : self.pos + 2] == "*/":
-                        self.pos += 2
-                        break
-                    if self.source[self.pos] == "\n":
-                        self.line += 1
-                    self.pos += 1
+    def tokenize(self) -> Iterator[Token]:
+        """Yield (type code, value, line) triples as they are scanned."""
+        src = self.source
+        n = len(src)
+        match = _MASTER_RE.match
+        intern = sys.intern
+        keywords = KEYWORDS
+        pos = 0
+        line = 1
+
+        while pos < n:
+            m = match(src, pos)
+            if m is None:
+                pos += 1  # unknown character: skipped, as before
+                continue
+
+            kind = m.lastgroup
+            end = m.end()
+
+            if kind is None or kind == "badcmt":
+                line += src.count("\n", pos, end)
+                pos = end
+                continue
+
+            value = m.group()
+            if kind == "sym":
+                yield (TT_SYMBOL, value, line)
+            elif kind == "int":
+                yield (TT_INT_CONST, value, line)
+            elif kind == "str":
+                if len(value) > 1 and value[-1] == '"':
+                    yield (TT_STRING_CONST, value[1:-1], line)
+                else:
+                    yield (TT_STRING_CONST, value[1:], line)
+                line += value.count("\n")
+            elif value in keywords:
+                # Interned keyword values make the parser's comparisons
+                # against (already-interned) literals pointer-fast
+                yield (TT_KEYWORD, intern(value), line)
             else:
-                break
+                yield (TT_IDENTIFIER, value, line)
+            pos = end
 
-    def _next_token(self) -> Optional[Token]:
-        ch = self.source[self.pos]
-        line = self.line
-
-        if ch in SYMBOLS:
-            self.pos += 1
-            return Token(TokenType.SYMBOL, ch, line)
-
-        if ch.isdigit():
-            start = self.pos
-            while self.pos < len(self.source) and self.source[self.pos].isdigit():
-                self.pos += 1
-            return Token(TokenType.INT_CONST, self.source[start : self.pos], line)
-
-        if ch == '"':
-            self.pos += 1
-            start = self.pos
-            while self.pos < len(self.source) and self.source[self.pos] != '"':
-                self.pos += 1
-            value = self.source[start : self.pos]
-            self.pos += 1
-            return Token(TokenType.STRING_CONST, value, line)
-
-        if ch.isalpha() or ch == "_":
-            start = self.pos
-            while self.pos < len(self.source) and (
-                self.source[self.pos].isalnum() or self.source[self.pos] == "_"
-            ):
-                self.pos += 1
-            value = self.source[start : self.pos]
-            if value in KEYWORDS:
-                return Token(TokenType.KEYWORD, value, line)
-            return Token(TokenType.IDENTIFIER, value, line)
-
-        self.pos += 1
-        return None
+        self.pos = pos
+        self.line = line
 
 
 # =============================================================================
@@ -155,12 +189,14 @@ class SymbolKind(Enum):
     LOCAL = "local"
 
 
-@dataclass
+@dataclass(slots=True)
 class Symbol:
     name: str
     symbol_type: str
     kind: SymbolKind
     index: int
+    # kind.value resolved once at definition; every reference emits it
+    kind_str: str = ""
 
 
 class SymbolTable:
@@ -169,28 +205,39 @@ class SymbolTable:
         self.subroutine_scope: Dict[str, Symbol] = {}
         self.counts: Dict[SymbolKind, int] = {k: 0 for k in SymbolKind}
         self.class_name = ""
+        # Flat name -> Symbol cache so references resolve with one probe;
+        # reset per subroutine to drop stale shadows
+        self._lookup_cache: Dict[str, Symbol] = {}
 
     def start_class(self, name: str):
         self.class_scope.clear()
+        self._lookup_cache.clear()
         self.counts[SymbolKind.STATIC] = 0
         self.counts[SymbolKind.FIELD] = 0
         self.class_name = name
 
     def start_subroutine(self):
         self.subroutine_scope.clear()
+        self._lookup_cache.clear()
         self.counts[SymbolKind.ARGUMENT] = 0
         self.counts[SymbolKind.LOCAL] = 0
 
     def define(self, name: str, symbol_type: str, kind: SymbolKind):
-        symbol = Symbol(name, symbol_type, kind, self.counts[kind])
+        symbol = Symbol(name, symbol_type, kind, self.counts[kind], kind.value)
         self.counts[kind] += 1
         if kind in (SymbolKind.STATIC, SymbolKind.FIELD):
             self.class_scope[name] = symbol
         else:
             self.subroutine_scope[name] = symbol
+        self._lookup_cache[name] = symbol
 
     def lookup(self, name: str) -> Optional[Symbol]:
-        return self.subroutine_scope.get(name) or self.class_scope.get(name)
+        symbol = self._lookup_cache.get(name)
+        if symbol is None:
+            symbol = self.class_scope.get(name)
+            if symbol is not None:
+                self._lookup_cache[name] = symbol
+        return symbol
 
     def var_count(self, kind: SymbolKind) -> int:
         return self.counts[kind]
@@ -204,39 +251,126 @@ class SymbolTable:
 # =============================================================================
 
 
+# Serialization prefixes: "push <segment> " / "pop <segment> " built once,
+# so stringifying a stack command is one concat plus str(index)
+_SEGMENTS = (
+    "constant",
+    "argument",
+    "local",
+    "static",
+    "this",
+    "that",
+    "pointer",
+    "temp",
+)
+_SEG_PUSH = {seg: f"push {seg} " for seg in _SEGMENTS}
+_SEG_POP = {seg: f"pop {seg} " for seg in _SEGMENTS}
+
+
 class VMWriter:
-    def __init__(self):
-        self.output: List[str] = []
+    """Streams VM commands to a writer through a small peephole window.
+
+    Commands enter as tagged tuples ("push", seg, i) / ("add",) / ... and
+    sit in a short deque; while optimization is on, redundant tail patterns
+    (double not/neg, push X popped straight back to X, push constant 0 +
+    add) collapse before anything is written. When the window overflows,
+    the oldest command is serialized and written through, so peak memory
+    stays O(window) instead of O(program).
+    """
+
+    def __init__(self, out, peephole: bool = True, window: int = 4):
+        self._out = out
+        self._pending: deque = deque()
+        self._peephole = peephole
+        self._window = window
+        self._hold = 0  # while positive, nothing is written through
+
+    def _write(self, part: tuple):
+        pending = self._pending
+        pending.append(part)
+        if self._peephole:
+            # Collapse the tail for as long as patterns keep forming
+            while len(pending) >= 2:
+                b = pending[-1]
+                a = pending[-2]
+                if a == b and (a == ("not",) or a == ("neg",)):
+                    pending.pop()
+                    pending.pop()
+                    continue
+                if (
+                    b[0] == "pop"
+                    and a[0] == "push"
+                    and a[1] == b[1]
+                    and a[2] == b[2]
+                    and a[1] != "constant"
+                ):
+                    pending.pop()
+                    pending.pop()
+                    continue
+                if b == ("add",) and a == ("push", "constant", 0):
+                    pending.pop()
+                    pending.pop()
+                    continue
+                break
+        if self._hold == 0:
+            while len(pending) > self._window:
+                self._out.write(_serialize(pending.popleft()))
+
+    def hold(self):
+        """Keep commands in the window (callers needing to reorder them)."""
+        self._hold += 1
+
+    def release(self):
+        self._hold -= 1
+
+    def flush(self):
+        pending = self._pending
+        out = self._out
+        while pending:
+            out.write(_serialize(pending.popleft()))
 
     def write_push(self, segment: str, index: int):
-        self.output.append(f"push {segment} {index}")
+        self._write(("push", segment, index))
 
     def write_pop(self, segment: str, index: int):
-        self.output.append(f"pop {segment} {index}")
+        self._write(("pop", segment, index))
 
     def write_arithmetic(self, cmd: str):
-        self.output.append(cmd)
+        self._write((cmd,))
 
     def write_label(self, label: str):
-        self.output.append(f"label {label}")
+        self._write(("label", label))
 
     def write_goto(self, label: str):
-        self.output.append(f"goto {label}")
+        self._write(("goto", label))
 
     def write_if_goto(self, label: str):
-        self.output.append(f"if-goto {label}")
+        self._write(("if-goto", label))
 
     def write_function(self, name: str, num_locals: int):
-        self.output.append(f"function {name} {num_locals}")
+        self._write(("function", name, num_locals))
 
     def write_call(self, name: str, num_args: int):
-        self.output.append(f"call {name} {num_args}")
+        self._write(("call", name, num_args))
 
     def write_return(self):
-        self.output.append("return")
+        self._write(("return",))
+
 
-    def get_output(self) -> str:
-        return "\n".join(self.output) + "\n"
+def _serialize(part: tuple) -> str:
+    tag = part[0]
+    if tag == "push":
+        return _SEG_PUSH[part[1]] + str(part[2]) + "\n"
+    if tag == "pop":
+        return _SEG_POP[part[1]] + str(part[2]) + "\n"
+    if len(part) == 1:
+        return tag + "\n"
+    if len(part) == 2:
+        label = part[1]
+        if type(label) is tuple:
+            return f"{tag} {label[0]}_{label[1]}\n"
+        return tag + " " + label + "\n"
+    return tag + " " + part[1] + " " + str(part[2]) + "\n"
 
 
 # =============================================================================
@@ -255,40 +389,61 @@ class JackCompiler:
         "=": "eq",
     }
 
-    def __init__(self, tokens: List[Token], optimize: bool = True):
-        self.tokens = tokens
-        self.pos = 0
+    def __init__(self, tokens: Iterator[Token], optimize: bool = True, out=None):
+        self._it = iter(tokens)
+        self._cur = next(self._it, EOF_TOKEN)
         self.symbols = SymbolTable()
-        self.vm = VMWriter()
+        self.vm = VMWriter(out, peephole=optimize)
         self.label_counter = 0
         self.class_name = ""
         self.subroutine_kind = ""
         self.optimize = optimize
-
-    def compile(self) -> str:
+        # Dispatch tables: one dict probe instead of if/elif chains over the
+        # current token's value
+        self._stmt_dispatch = {
+            "let": self._compile_let,
+            "if": self._compile_if,
+            "while": self._compile_while,
+            "do": self._compile_do,
+            "return": self._compile_return,
+        }
+        self._term_dispatch = {
+            "true": self._compile_true_term,
+            "false": self._compile_constant_zero_term,
+            "null": self._compile_constant_zero_term,
+            "this": self._compile_this_term,
+            "(": self._compile_paren_term,
+            "-": self._compile_unary_term,
+            "~": self._compile_unary_term,
+        }
+
+    def compile(self) -> None:
+        # Peephole optimization happens inside VMWriter as lines are emitted
         self._compile_class()
-        vm_code = self.vm.get_output()
-        if self.optimize:
-            vm_code = self._peephole_optimize(vm_code)
-        return vm_code
+        self.vm.flush()
 
-    def _current(self) -> Optional[Token]:
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+    def _peek_value(self) -> str:
+        return self._cur[1]
 
-    def _advance(self) -> Token:
-        token = self.tokens[self.pos]
-        self.pos += 1
-        return token
+    def _next(self):
+        self._cur = next(self._it, EOF_TOKEN)
 
-    def _expect(self, value: str):
-        token = self._advance()
-        if token.value != value:
-            raise SyntaxError(
-                f"Expected '{value}', got '{token.value}' at line {token.line}"
-            )
+    def _advance_value(self) -> str:
+        value = self._cur[1]
+        self._cur = next(self._it, EOF_TOKEN)
+        return value
 
-    def _unique_label(self, prefix: str) -> str:
-        label = f"{prefix}_{self.label_counter}"
+    def _expect(self, value: str):
+        token = self._cur
+        self._cur = next(self._it, EOF_TOKEN)
+        if token[1] != value:
+            got = "EOF" if token[0] == TT_EOF else token[1]
+            raise SyntaxError(f"Expected '{value}', got '{got}' at line {token[2]}")
+
+    def _unique_label(self, prefix: str) -> Tuple[str, int]:
+        # Labels stay (prefix, id) pairs until serialization, so branch
+        # emission allocates no formatted strings
+        label = (prefix, self.label_counter)
         self.label_counter += 1
         return label
 
@@ -296,43 +451,39 @@ class JackCompiler:
 
     def _compile_class(self):
         self._expect("class")
-        self.class_name = self._advance().value
+        self.class_name = self._advance_value()
         self.symbols.start_class(self.class_name)
         self._expect("{")
 
-        while self._current() and self._current().value in ("static", "field"):
+        while self._peek_value() in CLASSVAR_KWS:
             self._compile_class_var_dec()
 
-        while self._current() and self._current().value in (
-            "constructor",
-            "function",
-            "method",
-        ):
+        while self._peek_value() in SUBROUTINE_KWS:
             self._compile_subroutine()
 
         self._expect("}")
 
     def _compile_class_var_dec(self):
         kind = (
-            SymbolKind.STATIC if self._advance().value == "static" else SymbolKind.FIELD
+            SymbolKind.STATIC if self._advance_value() == "static" else SymbolKind.FIELD
         )
-        var_type = self._advance().value
-        name = self._advance().value
+        var_type = self._advance_value()
+        name = self._advance_value()
         self.symbols.define(name, var_type, kind)
 
-        while self._current() and self._current().value == ",":
-            self._advance()
-            name = self._advance().value
+        while self._peek_value() == ",":
+            self._next()
+            name = self._advance_value()
             self.symbols.define(name, var_type, kind)
 
         self._expect(";")
 
     def _compile_subroutine(self):
-        self.subroutine_kind = self._advance().value
+        self.subroutine_kind = self._advance_value()
         self.symbols.start_subroutine()
 
-        self._advance()  # return type (unused, but required by grammar)
-        name = self._advance().value
+        self._next()  # return type (unused, but required by grammar)
+        name = self._advance_value()
 
         if self.subroutine_kind == "method":
             self.symbols.define("this", self.class_name, SymbolKind.ARGUMENT)
@@ -344,21 +495,21 @@ class JackCompiler:
         self._compile_subroutine_body(name)
 
     def _compile_parameter_list(self):
-        if self._current() and self._current().value != ")":
-            var_type = self._advance().value
-            name = self._advance().value
+        if self._peek_value() != ")":
+            var_type = self._advance_value()
+            name = self._advance_value()
             self.symbols.define(name, var_type, SymbolKind.ARGUMENT)
 
-            while self._current() and self._current().value == ",":
-                self._advance()
-                var_type = self._advance().value
-                name = self._advance().value
+            while self._peek_value() == ",":
+                self._next()
+                var_type = self._advance_value()
+                name = self._advance_value()
                 self.symbols.define(name, var_type, SymbolKind.ARGUMENT)
 
     def _compile_subroutine_body(self, name: str):
         self._expect("{")
 
-        while self._current() and self._current().value == "var":
+        while self._peek_value() == "var":
             self._compile_var_dec()
 
         num_locals = self.symbols.var_count(SymbolKind.LOCAL)
@@ -377,13 +528,13 @@ class JackCompiler:
 
     def _compile_var_dec(self):
         self._expect("var")
-        var_type = self._advance().value
-        name = self._advance().value
+        var_type = self._advance_value()
+        name = self._advance_value()
         self.symbols.define(name, var_type, SymbolKind.LOCAL)
 
-        while self._current() and self._current().value == ",":
-            self._advance()
-            name = self._advance().value
+        while self._peek_value() == ",":
+            self._next()
+            name = self._advance_value()
             self.symbols.define(name, var_type, SymbolKind.LOCAL)
 
         self._expect(";")
@@ -391,33 +542,19 @@ class JackCompiler:
     # --- Statements ---
 
     def _compile_statements(self):
-        while self._current() and self._current().value in (
-            "let",
-            "if",
-            "while",
-            "do",
-            "return",
-        ):
-            if self._current().value == "let":
-                self._compile_let()
-            elif self._current().value == "if":
-                self._compile_if()
-            elif self._current().value == "while":
-                self._compile_while()
-            elif self._current().value == "do":
-                self._compile_do()
-            elif self._current().value == "return":
-                self._compile_return()
+        dispatch = self._stmt_dispatch
+        while (handler := dispatch.get(self._cur[1])) is not None:
+            handler()
 
     def _compile_let(self):
         self._expect("let")
-        var_name = self._advance().value
+        var_name = self._advance_value()
         symbol = self.symbols.lookup(var_name)
 
-        if self._current() and self._current().value == "[":
+        if self._peek_value() == "[":
             # Array assignment
-            self._advance()
-            self.vm.write_push(symbol.kind.value, symbol.index)
+            self._next()
+            self.vm.write_push(symbol.kind_str, symbol.index)
             self._compile_expression()
             self._expect("]")
             self.vm.write_arithmetic("add")
@@ -434,7 +571,7 @@ class JackCompiler:
             self._expect("=")
             self._compile_expression()
             self._expect(";")
-            self.vm.write_pop(symbol.kind.value, symbol.index)
+            self.vm.write_pop(symbol.kind_str, symbol.index)
 
     def _compile_if(self):
         self._expect("if")
@@ -455,8 +592,8 @@ class JackCompiler:
         self.vm.write_goto(end_label)
         self.vm.write_label(false_label)
 
-        if self._current() and self._current().value == "else":
-            self._advance()
+        if self._peek_value() == "else":
+            self._next()
             self._expect("{")
             self._compile_statements()
             self._expect("}")
@@ -492,7 +629,7 @@ class JackCompiler:
 
     def _compile_return(self):
         self._expect("return")
-        if self._current() and self._current().value != ";":
+        if self._peek_value() != ";":
             self._compile_expression()
         else:
             self.vm.write_push("constant", 0)
@@ -502,216 +639,229 @@ class JackCompiler:
     # --- Expressions ---
 
     def _compile_expression(self):
-        # Try constant folding first (only if optimization is enabled)
-        if self.optimize:
-            value = self._try_fold_expression()
-            if value is not None:
-                if 0 <= value <= 32767:
-                    self.vm.write_push("constant", value)
-                    return
-                elif -32768 <= value < 0:
-                    # Handle negative constants: push |value| then negate
-                    self.vm.write_push("constant", -value)
-                    self.vm.write_arithmetic("neg")
-                    return
-
-        # Normal compilation
-        self._compile_term()
-
-        while self._current() and self._current().value in "+-*/&|<>=":
-            op = self._advance().value
+        if not self.optimize:
             self._compile_term()
+            while (op := self._cur[1]) in BINOPS:
+                self._next()
+                self._compile_term()
+                self._write_binary_op(op)
+            return
+
+        # Constant folding happens bottom-up during the one real parse:
+        # subexpressions stay symbolic integers until a non-foldable part
+        # appears, at which point pending constants are flushed in order
+        value = self._compile_expression_value()
+        if value is not None:
+            self._push_constant(value)
+
+    def _write_binary_op(self, op: str):
+        if op == "*":
+            self.vm.write_call("Math.multiply", 2)
+        elif op == "/":
+            self.vm.write_call("Math.divide", 2)
+        else:
+            self.vm.write_arithmetic(self.BINARY_OPS[op])
+
+    def _push_constant(self, value: int):
+        """Push a folded constant, normalized to the 16-bit machine."""
+        value = ((value + 0x8000) & 0xFFFF) - 0x8000
+        if value >= 0:
+            self.vm.write_push("constant", value)
+        elif value == -32768:
+            # |value| would leave the VM spec's 0..32767 constant range
+            # (and @32768 is not a Hack A-instruction); ~32767 == -32768
+            self.vm.write_push("constant", 32767)
+            self.vm.write_arithmetic("not")
+        else:
+            # Negative constants: push |value| then negate
+            self.vm.write_push("constant", -value)
+            self.vm.write_arithmetic("neg")
 
-            if op == "*":
-                self.vm.write_call("Math.multiply", 2)
-            elif op == "/":
-                self.vm.write_call("Math.divide", 2)
-            else:
-                self.vm.write_arithmetic(self.BINARY_OPS[op])
-
-    def _try_fold_expression(self) -> Optional[int]:
-        """Attempt to fold a constant expression at compile time.
+    def _compile_expression_value(self) -> Optional[int]:
+        """Parse an expression; return its constant value if it folds.
 
-        Returns the folded value if successful, None otherwise.
-        Saves and restores position if folding fails.
+        A folded expression emits nothing. As soon as an operand or
+        operator cannot fold, everything pending is emitted (reordering the
+        captured right-operand code after the left constant when needed)
+        and None is returned.
         """
-        save_pos = self.pos
-        try:
-            result = self._fold_term()
-            if result is None:
-                self.pos = save_pos
-                return None
+        left = self._compile_term_value()
 
-            while self._current() and self._current().value in "+-*/&|<>=":
-                op = self._advance().value
-                right = self._fold_term()
-                if right is None:
-                    self.pos = save_pos
-                    return None
-                result = self._apply_fold_op(result, op, right)
-                if result is None:
-                    self.pos = save_pos
-                    return None
-
-            return result
-        except (IndexError, ValueError, TypeError):
-            self.pos = save_pos
-            return None
-
-    def _fold_term(self) -> Optional[int]:
-        """Attempt to fold a term. Returns None if not foldable."""
-        token = self._current()
-        if token is None:
-            return None
-
-        if token.type == TokenType.INT_CONST:
-            self._advance()
-            return int(token.value)
-
-        if token.value == "true":
-            self._advance()
-            return -1  # true = ~0 = -1 in 16-bit
-
-        if token.value in ("false", "null"):
-            self._advance()
-            return 0
-
-        if token.value == "(":
-            self._advance()
-            result = self._fold_expression_inner()
-            if result is None:
-                return None
-            if self._current() and self._current().value == ")":
-                self._advance()
-                return result
-            return None
-
-        if token.value == "-":
-            self._advance()
-            inner = self._fold_term()
-            return -inner if inner is not None else None
-
-        if token.value == "~":
-            self._advance()
-            inner = self._fold_term()
-            return ~inner if inner is not None else None
-
-        # Variables, arrays, function calls cannot be folded
-        return None
+        while (op := self._cur[1]) in BINOPS:
+            self._next()
 
-    def _fold_expression_inner(self) -> Optional[int]:
-        """Fold expression inside parentheses."""
-        result = self._fold_term()
-        if result is None:
-            return None
+            if left is None:
+                right = self._compile_term_value()
+                if right is not None:
+                    self._push_constant(right)
+                self._write_binary_op(op)
+                continue
 
-        while self._current() and self._current().value in "+-*/&|<>=":
-            op = self._advance().value
-            right = self._fold_term()
-            if right is None:
+            # While a folded left value is pending, the right term's code
+            # must stay in the window so it can be reordered if needed
+            vm = self.vm
+            pending = vm._pending
+            vm.hold()
+            mark = len(pending)
+            right = self._compile_term_value()
+
+            if right is not None:
+                vm.release()
+                folded = self._apply_fold_op(left, op, right)
+                if folded is not None:
+                    left = folded
+                    continue
+                # Op cannot fold (division by zero): emit the operands
+                self._push_constant(left)
+                self._push_constant(right)
+                self._write_binary_op(op)
+                left = None
+                continue
+
+            # Right emitted code, but the left constant belongs under it on
+            # the stack: splice the captured code back in after it
+            captured = []
+            while len(pending) > mark:
+                captured.append(pending.pop())
+            self._push_constant(left)
+            write = vm._write
+            while captured:
+                write(captured.pop())
+            vm.release()
+            left = None
+            self._write_binary_op(op)
+
+        return left
+
+    def _compile_term_value(self) -> Optional[int]:
+        """Parse a term; return its constant value, or emit it and return None."""
+        tt, value, _line = self._cur
+
+        if tt == TT_INT_CONST:
+            self._next()
+            return int(value)
+
+        if tt == TT_KEYWORD:
+            if value == "true":
+                self._next()
+                return -1  # true = ~0 = -1 in 16-bit
+            if value == "false" or value == "null":
+                self._next()
+                return 0
+
+        elif tt == TT_SYMBOL:
+            if value == "(":
+                self._next()
+                inner = self._compile_expression_value()
+                self._expect(")")
+                return inner
+            if value == "-":
+                self._next()
+                inner = self._compile_term_value()
+                if inner is not None:
+                    return -inner
+                self.vm.write_arithmetic("neg")
                 return None
-            result = self._apply_fold_op(result, op, right)
-            if result is None:
+            if value == "~":
+                self._next()
+                inner = self._compile_term_value()
+                if inner is not None:
+                    return ~inner
+                self.vm.write_arithmetic("not")
                 return None
 
-        return result
+        # Variables, arrays, calls, strings: never foldable
+        self._compile_term()
+        return None
 
     def _apply_fold_op(self, left: int, op: str, right: int) -> Optional[int]:
         """Apply a binary operation at compile time."""
-        if op == "+":
-            return (left + right) & 0xFFFF  # Wrap to 16-bit
-        if op == "-":
-            return (left - right) & 0xFFFF
-        if op == "*":
-            return (left * right) & 0xFFFF
-        if op == "/":
-            return left // right if right != 0 else None  # Avoid division by zero
-        if op == "&":
-            return left & right
-        if op == "|":
-            return left | right
-        if op == "<":
-            return -1 if left < right else 0
-        if op == ">":
-            return -1 if left > right else 0
-        if op == "=":
-            return -1 if left == right else 0
-        return None
+        return _FOLD_OPS[op](left, right)
 
     def _compile_term(self):
-        token = self._current()
+        tt, value, line = self._cur
 
-        if token.type == TokenType.INT_CONST:
-            self._advance()
-            self.vm.write_push("constant", int(token.value))
+        if tt == TT_INT_CONST:
+            self._next()
+            self.vm.write_push("constant", int(value))
 
-        elif token.type == TokenType.STRING_CONST:
-            self._advance()
-            self.vm.write_push("constant", len(token.value))
+        elif tt == TT_STRING_CONST:
+            self._next()
+            self.vm.write_push("constant", len(value))
             self.vm.write_call("String.new", 1)
-            for ch in token.value:
+            for ch in value:
                 self.vm.write_push("constant", ord(ch))
                 self.vm.write_call("String.appendChar", 2)
 
-        elif token.value == "true":
-            self._advance()
-            self.vm.write_push("constant", 0)
-            self.vm.write_arithmetic("not")
+        elif tt == TT_IDENTIFIER:
+            self._compile_identifier_term()
 
-        elif token.value in ("false", "null"):
-            self._advance()
-            self.vm.write_push("constant", 0)
+        else:
+            handler = self._term_dispatch.get(value)
+            if handler is None:
+                raise SyntaxError(f"Unexpected term '{value}' at line {line}")
+            handler()
+
+    def _compile_true_term(self):
+        self._next()
+        self.vm.write_push("constant", 0)
+        self.vm.write_arithmetic("not")
 
-        elif token.value == "this":
-            self._advance()
-            self.vm.write_push("pointer", 0)
+    def _compile_constant_zero_term(self):
+        self._next()  # false | null
+        self.vm.write_push("constant", 0)
 
-        elif token.value == "(":
-            self._advance()
-            self._compile_expression()
-            self._expect(")")
+    def _compile_this_term(self):
+        self._next()
+        self.vm.write_push("pointer", 0)
 
-        elif token.value in "-~":
-            op = self._advance().value
-            self._compile_term()
-            self.vm.write_arithmetic("neg" if op == "-" else "not")
+    def _compile_paren_term(self):
+        self._next()
+        self._compile_expression()
+        self._expect(")")
 
-        elif token.type == TokenType.IDENTIFIER:
-            name = self._advance().value
+    def _compile_unary_term(self):
+        op = self._advance_value()
+        self._compile_term()
+        self.vm.write_arithmetic("neg" if op == "-" else "not")
 
-            if self._current() and self._current().value == "[":
-                # Array access
-                symbol = self.symbols.lookup(name)
-                self._advance()
-                self.vm.write_push(symbol.kind.value, symbol.index)
-                self._compile_expression()
-                self._expect("]")
-                self.vm.write_arithmetic("add")
-                self.vm.write_pop("pointer", 1)
-                self.vm.write_push("that", 0)
+    def _compile_identifier_term(self):
+        name = self._advance_value()
 
-            elif self._current() and self._current().value in "(.":
-                # Subroutine call
-                self.pos -= 1  # Put back the identifier
-                self._compile_subroutine_call()
+        if self._peek_value() == "[":
+            # Array access
+            symbol = self.symbols.lookup(name)
+            self._next()
+            self.vm.write_push(symbol.kind_str, symbol.index)
+            self._compile_expression()
+            self._expect("]")
+            self.vm.write_arithmetic("add")
+            self.vm.write_pop("pointer", 1)
+            self.vm.write_push("that", 0)
 
-            else:
-                # Variable access
-                symbol = self.symbols.lookup(name)
-                self.vm.write_push(symbol.kind.value, symbol.index)
+        elif self._peek_value() in ("(", "."):
+            # Subroutine call; the name is already consumed, so pass it
+            # along instead of pushing the token back
+            self._compile_subroutine_call(name)
+
+        else:
+            # Variable access
+            symbol = self.symbols.lookup(name)
+            self.vm.write_push(symbol.kind_str, symbol.index)
 
-    def _compile_subroutine_call(self):
-        name = self._advance().value
+    def _compile_subroutine_call(self, name: Optional[str] = None):
+        if name is None:
+            name = self._advance_value()
         num_args = 0
 
-        if self._current() and self._current().value == ".":
-            self._advance()
-            method_name = self._advance().value
+        if self._peek_value() == ".":
+            self._next()
+            method_name = self._advance_value()
 
             symbol = self.symbols.lookup(name)
             if symbol:
                 # Method call on object
-                self.vm.write_push(symbol.kind.value, symbol.index)
+                self.vm.write_push(symbol.kind_str, symbol.index)
                 full_name = f"{symbol.symbol_type}.{method_name}"
                 num_args = 1
             else:
@@ -731,75 +881,44 @@ class JackCompiler:
 
     def _compile_expression_list(self) -> int:
         count = 0
-        if self._current() and self._current().value != ")":
+        if self._cur[1] != ")":
             self._compile_expression()
             count = 1
 
-            while self._current() and self._current().value == ",":
-                self._advance()
+            while self._cur[1] == ",":
+                self._next()
                 self._compile_expression()
                 count += 1
 
         return count
 
-    # --- Peephole Optimization ---
-
-    def _peephole_optimize(self, vm_code: str) -> str:
-        lines = vm_code.strip().split("\n")
-        optimized = []
-        i = 0
-
-        while i < len(lines):
-            # Pattern: not / not -> remove both
-            if i + 1 < len(lines) and lines[i] == "not" and lines[i + 1] == "not":
-                i += 2
-                continue
-
-            # Pattern: neg / neg -> remove both
-            if i + 1 < len(lines) and lines[i] == "neg" and lines[i + 1] == "neg":
-                i += 2
-                continue
-
-            # Pattern: push X / pop X (same location) -> remove both
-            if i + 1 < len(lines):
-                if lines[i].startswith("push ") and lines[i + 1].startswith("pop "):
-                    push_rest = lines[i][5:]
-                    pop_rest = lines[i + 1][4:]
-                    if push_rest == pop_rest and not push_rest.startswith("constant"):
-                        i += 2
-                        continue
-
-            # Pattern: push constant 0 / add -> remove both
-            if (
-                i + 1 < len(lines)
-                and lines[i] == "push constant 0"
-                and lines[i + 1] == "add"
-            ):
-                i += 2
-                continue
-
-            optimized.append(lines[i])
-            i += 1
-
-        return "\n".join(optimized) + "\n" if optimized else ""
-
 
 # =============================================================================
 # Main
 # =============================================================================
 
 
-def compile_file(filepath: str, optimize: bool = True) -> Tuple[str, str]:
+def compile_file(filepath: str, output_path: str, optimize: bool = True) -> str:
+    """Compile one .jack file, streaming VM code into output_path."""
     with open(filepath, "r") as f:
         source = f.read()
 
     basename = os.path.splitext(os.path.basename(filepath))[0]
     tokenizer = JackTokenizer(source)
     tokens = tokenizer.tokenize()
-    compiler = JackCompiler(tokens, optimize)
-    vm_code = compiler.compile()
+    try:
+        with open(output_path, "w") as out:
+            compiler = JackCompiler(tokens, optimize, out)
+            compiler.compile()
+    except Exception:
+        # Don't leave a truncated .vm behind
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        raise
 
-    return basename, vm_code
+    return basename
 
 
 def main():
@@ -839,16 +958,42 @@ def main():
         print(f"Error: No .jack files found in {path}", file=sys.stderr)
         sys.exit(2)
 
-    for jack_file in jack_files:
+    def output_path_for(jack_file: str) -> str:
+        basename = os.path.splitext(os.path.basename(jack_file))[0]
+        return os.path.join(output_dir, f"{basename}.vm")
+
+    if len(jack_files) > 1:
+        # Each file compiles independently and streams its own output;
+        # fan out across cores
+        with ProcessPoolExecutor() as executor:
+            futures = [
+                (
+                    f,
+                    executor.submit(
+                        compile_file, f, output_path_for(f), optimize=optimize
+                    ),
+                )
+                for f in jack_files
+            ]
+            results = [(f, future.result) for f, future in futures]
+    else:
+        results = [
+            (
+                f,
+                functools.partial(
+                    compile_file, f, output_path_for(f), optimize=optimize
+                ),
+            )
+            for f in jack_files
+        ]
+
+    for jack_file, get_result in results:
         try:
-            basename, vm_code = compile_file(jack_file, optimize)
-            output_path = os.path.join(output_dir, f"{basename}.vm")
-            with open(output_path, "w") as f:
-                f.write(vm_code)
-            print(f"Compiled {basename}.jack -> {basename}.vm")
+            basename = get_result()
         except Exception as e:
             print(f"Error compiling {jack_file}: {e}", file=sys.stderr)
             sys.exit(1)
+        print(f"Compiled {basename}.jack -> {basename}.vm")
 
 
 if __name__ == "__main__":